@@ -2,7 +2,6 @@ from flask import Flask, request, redirect, session
 from flask_login import LoginManager
 from flask_wtf.csrf import CSRFProtect
 
-import dmapiclient
 import dmcontent.govuk_frontend
 from dmutils import init_app
 from dmutils.user import User
@@ -11,9 +10,21 @@ from govuk_frontend_jinja.flask_ext import init_govuk_frontend
 
 from config import configs
 
+from .api_client import CachingDataAPIClient
+from .concurrency import APIExecutor
+from .invalidation import InvalidationBus
+from .resilience import APIResilience
+from .response_cache import APIResponseCache
+
 
 login_manager = LoginManager()
-data_api_client = dmapiclient.DataAPIClient()
+api_response_cache = APIResponseCache()
+api_resilience = APIResilience()
+invalidation_bus = InvalidationBus()
+data_api_client = CachingDataAPIClient(
+    response_cache=api_response_cache, resilience=api_resilience, invalidation_bus=invalidation_bus,
+)
+api_executor = APIExecutor()
 csrf = CSRFProtect()
 
 
@@ -32,6 +43,11 @@ def create_app(config_name):
         login_manager=login_manager,
     )
 
+    # after init_app, which sets up the Redis connection used for sessions that these share
+    api_response_cache.init_app(application)
+    invalidation_bus.init_app(application)
+    api_resilience.init_app(application)
+
     from .metrics import metrics as metrics_blueprint, gds_metrics
     from .create_buyer.views.create_buyer import create_buyer as create_buyer_blueprint
     from .main import dos as dos_blueprint
@@ -53,6 +69,7 @@ def create_app(config_name):
     login_manager.login_message = None  # don't flash message to user
     gds_metrics.init_app(application)
     csrf.init_app(application)
+    api_executor.init_app(application)
 
     # We want to be able to access this function from within all templates
     application.jinja_env.globals["render_question"] = (
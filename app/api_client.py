@@ -0,0 +1,404 @@
+import copy
+import logging
+import re
+import threading
+import time
+from concurrent.futures import Future
+from functools import partial
+from urllib.parse import urlsplit, urlunsplit
+
+from dmapiclient import APIError, DataAPIClient
+from flask import has_request_context
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import EmptyPoolError
+
+from .concurrency import get_request_state
+from .json_codec import STDLIB_JSON_CODEC, get_json_codec
+from .metrics import (
+    data_api_batches,
+    data_api_connection_pool_checkouts,
+    data_api_connection_pool_new_connections,
+    data_api_connection_pool_waits,
+    data_api_read_cache,
+    data_api_response_decode_seconds,
+    data_api_response_size_bytes,
+    data_api_response_wire_bytes,
+)
+from .resilience import APIResilience
+
+
+logger = logging.getLogger(__name__)
+
+# the id of the brief a write changes, if it's made to one that already exists
+BRIEF_WRITE_URL_PATTERN = re.compile(r'^/briefs/(\d+)(?:/|$)')
+
+
+class _RecordedRequest(Exception):
+    """Stops a client call once the request it would make has been recorded for a batch"""
+
+
+# the body of the last response whose ``json()`` was called in each thread
+_decoded_bodies = threading.local()
+
+
+class _InstrumentedConnectionPoolMixin(object):
+    def __init__(self, *args, pool_timeout=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool_timeout = pool_timeout
+
+    def _get_conn(self, timeout=None):
+        data_api_connection_pool_checkouts.inc()
+        # if every connection the pool allows is already checked out this either waits for one to be returned (for
+        # at most `pool_timeout` seconds) or (if the pool doesn't block) opens one that won't be kept
+        if self.pool is not None and self.pool.empty():
+            data_api_connection_pool_waits.inc()
+        return super()._get_conn(timeout=self.pool_timeout if timeout is None else timeout)
+
+    def _new_conn(self):
+        data_api_connection_pool_new_connections.inc()
+        return super()._new_conn()
+
+
+class _InstrumentedHTTPConnectionPool(_InstrumentedConnectionPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _InstrumentedHTTPSConnectionPool(_InstrumentedConnectionPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """An HTTPAdapter whose connection pools report checkouts, waits and new connections to Prometheus.
+
+    If the pools block, a request waits at most `pool_timeout` seconds for a connection to be returned before failing
+    with a ``requests.ConnectionError`` (None waits for as long as it takes).
+
+    The ``json()`` of each response it builds decodes the body with `json_codec`, reporting the size of the body, the
+    number of bytes it took on the wire (less if it was compressed) and how long it took to decode for the response's
+    endpoint. The body is kept for the thread that decoded it, so it can be decoded again later.
+    """
+
+    def __init__(self, *args, json_codec=None, pool_timeout=None, **kwargs):
+        self.json_codec = json_codec or STDLIB_JSON_CODEC
+        self.pool_timeout = pool_timeout
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': partial(_InstrumentedHTTPConnectionPool, pool_timeout=self.pool_timeout),
+            'https': partial(_InstrumentedHTTPSConnectionPool, pool_timeout=self.pool_timeout),
+        }
+
+    def send(self, request, **kwargs):
+        try:
+            return super().send(request, **kwargs)
+        except EmptyPoolError as e:
+            # requests passes this on as it is, rather than as one of its own errors the API client would handle
+            raise RequestsConnectionError(e, request=request)
+
+    def build_response(self, req, resp):
+        response = super().build_response(req, resp)
+        endpoint = APIResilience.get_endpoint(req.method, req.url)
+        loads = self.json_codec.loads
+
+        def decode_json(**kwargs):
+            content = response.content
+            data_api_response_wire_bytes.labels(
+                endpoint=endpoint, encoding=response.headers.get('Content-Encoding', 'identity'),
+            ).inc(response.raw.tell())
+            start_time = time.perf_counter()
+            decoded = loads(content)
+            _decoded_bodies.last = content
+            data_api_response_decode_seconds.labels(endpoint=endpoint).observe(time.perf_counter() - start_time)
+            data_api_response_size_bytes.labels(endpoint=endpoint).observe(len(content))
+            return decoded
+
+        response.json = decode_json
+        return response
+
+
+class CachingDataAPIClient(DataAPIClient):
+    """A DataAPIClient which makes each distinct read at most once per request.
+
+    The response to a GET is kept for the rest of the request, including any calls made for it by the API executor
+    (which are given the request's ``RequestState``), and any write made during the request forgets them all. If
+    another thread (serving this or any other request) is already making the same GET, its response is waited for
+    rather than making our own (single-flight), unless there's been a write since it started. The caller that made
+    the read gets the response it decoded, and everyone after it (or waiting for it) a fresh decoding of its body, so
+    changing a response can't affect anyone else. A response that wasn't decoded in the caller's thread (a response
+    cache hit or a hedged read) is copied instead. Outside of a request reads go straight to the API.
+
+    The base client makes a new ``requests`` session, and so new connections, for every call. Here every session
+    shares the same ``PooledHTTPAdapter``, so connections to the API are kept alive and reused by every thread, up to
+    ``DM_DATA_API_POOL_MAXSIZE`` of them at once (more wait, for up to ``DM_DATA_API_POOL_TIMEOUT`` seconds, if
+    ``DM_DATA_API_POOL_BLOCK`` is set, otherwise extra connections are opened and closed after use). Responses are
+    decoded with `json_codec`, or ``DM_DATA_API_JSON_CODEC`` once ``init_app`` has been called, defaulting to the
+    fastest one installed. Unless ``DM_DATA_API_COMPRESSION`` is turned off responses are asked for gzipped, and
+    decompressed as they're read.
+
+    Reads the process doesn't already have an answer for go through `response_cache` (an ``APIResponseCache``) if
+    one is given.
+
+    ``find_briefs`` and ``find_brief_responses`` take a list of `fields` to have the API leave everything else out of
+    each item it lists, which makes the response smaller and quicker to decode. Items are trimmed to those fields
+    here too, so views can't come to depend on fields they didn't ask for. The current API doesn't support this, so
+    `fields` is ignored (and every field is fetched and kept) unless `supports_projection`, or
+    ``DM_DATA_API_SUPPORTS_PROJECTION``, says it does.
+
+    Every call the API is actually asked is made through `resilience` (an ``APIResilience``) if one is given, which
+    may refuse to make it or make it twice.
+
+    Every write that changes a brief is announced on `invalidation_bus` (an ``InvalidationBus``) if one is given, so
+    views don't have to remember to. The brief is the one the API returns; if it doesn't return one (as when a brief
+    is deleted) it's the one read earlier in the request, which every view changing a brief will have checked.
+
+    ``prefetch`` makes the reads a view is about to need in one round trip, using the API's batch endpoint at
+    ``DM_DATA_API_BATCH_PATH``. That's off until the API has one: without it (or if the API turns out not to have it)
+    ``prefetch`` does nothing, and the reads are made one by one when they're needed.
+    """
+
+    RESPONSES_ENVIRON_KEY = 'dm.data_api_responses'
+
+    def __init__(
+        self, *args, pool_maxsize=10, pool_block=False, pool_timeout=None, response_cache=None, resilience=None,
+        invalidation_bus=None, json_codec=None, compression=True, batch_path=None, supports_projection=False, **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        self._invalidation_bus = invalidation_bus
+        self._supports_projection = supports_projection
+        self._compression = compression
+        self._batch_path = batch_path
+        self._json_codec = json_codec or get_json_codec()
+        self._response_cache = response_cache
+        self._resilience = resilience
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+        self._write_generation = 0
+        self._pool_maxsize = pool_maxsize
+        self._pool_block = pool_block
+        self._pool_timeout = pool_timeout
+        self._adapters = {}
+        self._adapters_lock = threading.Lock()
+        self._projection = threading.local()
+        self._batch = threading.local()
+
+    def init_app(self, app):
+        super().init_app(app)
+        self._timeout = (app.config['DM_DATA_API_CONNECT_TIMEOUT'], app.config['DM_DATA_API_READ_TIMEOUT'])
+        self._pool_maxsize = app.config['DM_DATA_API_POOL_MAXSIZE']
+        self._pool_block = app.config['DM_DATA_API_POOL_BLOCK']
+        self._pool_timeout = app.config['DM_DATA_API_POOL_TIMEOUT']
+        self._json_codec = get_json_codec(app.config['DM_DATA_API_JSON_CODEC'])
+        self._compression = app.config['DM_DATA_API_COMPRESSION']
+        self._batch_path = app.config['DM_DATA_API_BATCH_PATH']
+        self._supports_projection = app.config['DM_DATA_API_SUPPORTS_PROJECTION']
+        with self._adapters_lock:
+            self._adapters = {}
+
+    def _requests_retry_session(self, **kwargs):
+        session = super()._requests_retry_session(**kwargs)
+        session.headers['Accept-Encoding'] = 'gzip' if self._compression else 'identity'
+        request_state = get_request_state()
+        if request_state is not None and not has_request_context():
+            # the base client only adds these itself when it has the request context
+            session.headers.update(request_state.onwards_request_headers)
+
+        # there's an adapter for each retry policy the base client uses, each using the policy it gave this session
+        adapter_key = tuple(sorted(kwargs.items()))
+        with self._adapters_lock:
+            adapter = self._adapters.get(adapter_key)
+            if adapter is None:
+                adapter = self._adapters[adapter_key] = PooledHTTPAdapter(
+                    max_retries=session.get_adapter('https://').max_retries,
+                    pool_maxsize=self._pool_maxsize,
+                    pool_block=self._pool_block,
+                    pool_timeout=self._pool_timeout,
+                    json_codec=self._json_codec,
+                )
+
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _call_api(self, method, url, data=None, params=None, **kwargs):
+        def make_request():
+            return super(CachingDataAPIClient, self)._request(method, url, data=data, params=params, **kwargs)
+
+        if self._resilience is None:
+            return make_request()
+        return self._resilience.call(method, url, make_request)
+
+    def _get_response(self, url, params, **kwargs):
+        def fetch_response():
+            return self._call_api('GET', url, params=params, **kwargs)
+
+        if self._response_cache is None:
+            return fetch_response()
+
+        split_url = urlsplit(self._build_url(url, params))
+        return self._response_cache.get_or_fetch(
+            split_url.path + ('?' + split_url.query if split_url.query else ''),
+            fetch_response,
+        )
+
+    def _find_projected(self, find, list_key, fields, *args, **kwargs):
+        if fields is None or not self._supports_projection:
+            return find(*args, **kwargs)
+
+        # _request adds the fields to the GET that `find` makes in this thread
+        self._projection.fields = fields
+        try:
+            response = find(*args, **kwargs)
+        finally:
+            self._projection.fields = None
+
+        response[list_key] = [
+            {field: item[field] for field in fields if field in item} for item in response[list_key]
+        ]
+        return response
+
+    def find_briefs(self, *args, fields=None, **kwargs):
+        return self._find_projected(super().find_briefs, 'briefs', fields, *args, **kwargs)
+
+    def find_brief_responses(self, *args, fields=None, **kwargs):
+        return self._find_projected(super().find_brief_responses, 'briefResponses', fields, *args, **kwargs)
+
+    def _record_requests(self, calls):
+        recorded_urls = self._batch.recorded_urls = []
+        try:
+            for call in calls:
+                try:
+                    call()
+                except _RecordedRequest:
+                    pass
+        finally:
+            self._batch.recorded_urls = None
+        return recorded_urls
+
+    @staticmethod
+    def _get_batch_request_url(url):
+        # the batch endpoint takes the path and query of each read; the base client has already joined the path on to
+        # the base URL, so it doesn't matter whether that has a trailing slash
+        split_url = urlsplit(url)
+        return urlunsplit(('', '', split_url.path, split_url.query, ''))
+
+    def prefetch(self, *calls):
+        """Make the reads that `calls` (functions making a client call each) would make in a single batch request.
+
+        Their responses are kept for the rest of the request, so making the calls afterwards doesn't call the API.
+        Reads already made in this request are left out, and outside of a request nothing is done.
+        """
+        request_state = get_request_state()
+        if request_state is None or self._batch_path is None:
+            return
+
+        responses = request_state.environ.setdefault(self.RESPONSES_ENVIRON_KEY, {})
+        urls = [url for url in self._record_requests(calls) if url not in responses]
+        if len(urls) < 2:
+            return
+
+        try:
+            batch = self._call_api('POST', self._batch_path, data={
+                'requests': [{'method': 'GET', 'url': self._get_batch_request_url(url)} for url in urls],
+            })
+        except APIError as e:
+            if e.status_code in (404, 405):
+                logger.warning("The data API has no batch endpoint at %s, reads won't be batched", self._batch_path)
+                self._batch_path = None
+            data_api_batches.labels(result='failed').inc()
+            return
+
+        data_api_batches.labels(result='made').inc()
+        for url, batch_response in zip(urls, batch['responses']):
+            # failed reads are left to be made (and fail) individually
+            if batch_response['status'] == 200:
+                responses[url] = batch_response['body']
+
+    def _request(self, method, url, data=None, params=None, **kwargs):
+        fields = getattr(self._projection, 'fields', None)
+        if method == 'GET' and fields:
+            params = dict(params or {}, fields=','.join(fields))
+
+        recorded_urls = getattr(self._batch, 'recorded_urls', None)
+        if recorded_urls is not None:
+            if method != 'GET':
+                raise ValueError("Only reads can be batched")
+            recorded_urls.append(self._build_url(url, params))
+            raise _RecordedRequest()
+
+        if method != 'GET':
+            self._write_generation += 1
+            request_state = get_request_state()
+            responses = {}
+            if request_state is not None:
+                responses = request_state.environ.pop(self.RESPONSES_ENVIRON_KEY, None) or {}
+            response = self._call_api(method, url, data=data, params=params, **kwargs)
+            if self._invalidation_bus is not None:
+                self._announce_brief_change(url, response, responses)
+            return response
+
+        request_state = get_request_state()
+        if request_state is None:
+            return self._get_response(url, params, **kwargs)
+        return self._get_request_response(request_state, url, params, **kwargs)
+
+    def _announce_brief_change(self, url, response, responses):
+        if isinstance(response, dict) and isinstance(response.get('briefs'), dict):
+            # a new brief (created or copied) or the new version of the one changed
+            self._invalidation_bus.brief_changed(response['briefs'])
+            return
+
+        brief_url_match = BRIEF_WRITE_URL_PATTERN.match(url)
+        if brief_url_match is None:
+            return
+        brief_id = int(brief_url_match.group(1))
+        read_brief = responses.get(self._build_url('/briefs/{}'.format(brief_id), None))
+        self._invalidation_bus.brief_changed(read_brief['briefs'] if read_brief else {'id': brief_id})
+
+    def _get_request_response(self, request_state, url, params, **kwargs):
+        responses = request_state.environ.setdefault(self.RESPONSES_ENVIRON_KEY, {})
+        full_url = self._build_url(url, params)
+        if full_url in responses:
+            data_api_read_cache.labels(result='hit').inc()
+            return self._copy_response(responses[full_url])
+
+        in_flight_key = (self._write_generation, full_url)
+        with self._in_flight_lock:
+            response_future = self._in_flight.get(in_flight_key)
+            is_leader = response_future is None
+            if is_leader:
+                response_future = self._in_flight[in_flight_key] = Future()
+
+        if not is_leader:
+            data_api_read_cache.labels(result='shared').inc()
+            kept_response = responses[full_url] = response_future.result()
+            return self._copy_response(kept_response)
+
+        data_api_read_cache.labels(result='miss').inc()
+        _decoded_bodies.last = None
+        try:
+            response = self._get_response(url, params, **kwargs)
+            kept_response = _decoded_bodies.last
+            if kept_response is None:
+                kept_response = copy.deepcopy(response)
+            response_future.set_result(kept_response)
+        except Exception as e:
+            response_future.set_exception(e)
+            raise
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[in_flight_key]
+
+        responses[full_url] = kept_response
+        return response
+
+    def _copy_response(self, kept_response):
+        """Return a copy of a response kept for later callers, which is either the body of the response or (if it
+        wasn't decoded in this thread) the decoded response itself
+        """
+        if isinstance(kept_response, bytes):
+            return self._json_codec.loads(kept_response)
+        return copy.deepcopy(kept_response)
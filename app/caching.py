@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache(object):
+    """A thread-safe mapping holding at most `maxsize` entries, discarding the least recently used first.
+
+    ``hits`` and ``misses`` count how often ``get_or_set`` found an existing entry.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get_or_set(self, key, make_value):
+        """Return the value cached for `key`, calling `make_value` to create and cache it if there isn't one"""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+
+        # the lock isn't held while making the value, so two threads missing at the same time may both make it
+        value = make_value()
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class TTLCache(object):
+    """A thread-safe mapping whose entries expire `ttl` seconds after they're set.
+
+    For `stale_ttl` seconds after an entry expires ``get_or_set`` still returns it, while a background thread makes
+    a fresh value to replace it (stale-while-revalidate), so callers only ever wait for a value that has never been
+    made or that's been stale for longer than that. If the refresh fails the stale value carries on being used until
+    its `stale_ttl` runs out. A `ttl` of 0 turns caching off altogether.
+
+    Entries that are too stale to use are dropped whenever a value is set, and if `maxsize` is given the entries set
+    longest ago are dropped to keep at most that many. A value that was being made when ``invalidate`` was called
+    isn't cached, so it can't bring back what was invalidated.
+    """
+
+    def __init__(self, ttl=0, stale_ttl=0, maxsize=None, clock=time.monotonic):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        # in the order they were set, which (as every entry has the same ttl) is also the order they expire in
+        self._data = OrderedDict()
+        self._refreshing = set()
+        self._invalidations = 0
+        self._lock = threading.Lock()
+
+    def configure(self, ttl, stale_ttl=0, maxsize=None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.maxsize = maxsize
+        self.invalidate()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        # only values that haven't expired count: ``get_or_set`` makes a fresh value in place of any other
+        with self._lock:
+            return key in self._data and self._clock() < self._data[key][1]
+
+    def get_or_set(self, key, make_value):
+        """Return the value cached for `key`, calling `make_value` to create and cache it if there isn't one"""
+        if not self.ttl:
+            return make_value()
+
+        now = self._clock()
+        with self._lock:
+            invalidations = self._invalidations
+            if key in self._data:
+                value, expires_at = self._data[key]
+                if now < expires_at + self.stale_ttl:
+                    self.hits += 1
+                    if now >= expires_at and key not in self._refreshing:
+                        self._refreshing.add(key)
+                        threading.Thread(
+                            target=self._refresh, args=(key, make_value, invalidations), daemon=True,
+                        ).start()
+                    return value
+            self.misses += 1
+
+        value = make_value()
+        self._set(key, value, invalidations)
+        return value
+
+    def _set(self, key, value, invalidations):
+        now = self._clock()
+        with self._lock:
+            if self._invalidations != invalidations:
+                # this value may have been made from data the invalidation was for
+                return
+            self._data[key] = (value, now + self.ttl)
+            self._data.move_to_end(key)
+            while self._data:
+                oldest_key, (oldest_value, expires_at) = next(iter(self._data.items()))
+                if now < expires_at + self.stale_ttl and (self.maxsize is None or len(self._data) <= self.maxsize):
+                    break
+                del self._data[oldest_key]
+
+    def _refresh(self, key, make_value, invalidations):
+        try:
+            self._set(key, make_value(), invalidations)
+        except Exception as e:
+            logger.warning("Failed to refresh cached value for %s: %s", key, e)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def invalidate(self, key=None):
+        """Forget the value cached for `key`, or every cached value if no key is given"""
+        with self._lock:
+            self._invalidations += 1
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
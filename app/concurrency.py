@@ -0,0 +1,99 @@
+import threading
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+from flask import current_app, has_request_context, request
+
+
+# What a call made in another thread on behalf of a request needs to know about it: the request's WSGI environ
+# (where the API client keeps the responses it has had during the request) and the headers passing its trace on to
+# the API. Both are captured in the request's own thread.
+RequestState = namedtuple('RequestState', ['environ', 'onwards_request_headers'])
+
+_thread_request_state = threading.local()
+
+
+def _get_onwards_request_headers():
+    # the same headers dmapiclient adds to calls made with a request context
+    if callable(getattr(request, 'get_onwards_request_headers', None)):
+        return dict(request.get_onwards_request_headers())
+    if getattr(request, 'request_id', None) and current_app.config.get('DM_REQUEST_ID_HEADER'):
+        return {current_app.config['DM_REQUEST_ID_HEADER']: request.request_id}
+    return {}
+
+
+def get_request_state():
+    """The RequestState of the request the current thread is working for, or None if it isn't working for one.
+
+    In a request's own thread it's captured from the request context; in a thread making a call for a request it's
+    the state that was passed to it with ``call_with_request_state``.
+    """
+    if has_request_context():
+        return RequestState(request.environ, _get_onwards_request_headers())
+    return getattr(_thread_request_state, 'state', None)
+
+
+def call_with_request_state(request_state, fn, *args, **kwargs):
+    """Call `fn` with the given arguments, with `request_state` as the thread's RequestState while it runs.
+
+    Unlike a copy of the request context, this doesn't give `fn` the request itself, and nothing about the request is
+    torn down when it's done. Functions called like this mustn't use the request context (``request``,
+    ``current_user``, ``session``...).
+    """
+    previous_request_state = getattr(_thread_request_state, 'state', None)
+    _thread_request_state.state = request_state
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _thread_request_state.state = previous_request_state
+
+
+class APIExecutor(object):
+    """Makes independent data API calls at the same time, using a thread pool shared by every request an app handles.
+
+    Calls are plain functions, run with the submitting request's ``RequestState`` so the API client still shares the
+    request's responses and passes on its tracing headers; they don't have the request context. Until ``init_app``
+    has been called (e.g. in scripts) calls are simply made as they're submitted.
+    """
+
+    def __init__(self, app=None):
+        self._executor = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # every app made in this process (one per test, or after a reload) would otherwise leave its pool's idle
+        # threads behind
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._executor = ThreadPoolExecutor(
+            max_workers=app.config['DM_API_EXECUTOR_THREADS'],
+            thread_name_prefix='api-executor',
+        )
+
+    def submit(self, fn, *args, **kwargs):
+        """Start calling `fn` with the given arguments, returning a Future for its result"""
+        if self._executor is None:
+            return self._call_now(fn, *args, **kwargs)
+
+        return self._executor.submit(call_with_request_state, get_request_state(), fn, *args, **kwargs)
+
+    @staticmethod
+    def _call_now(fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def run(self, *calls):
+        """Make each of `calls` (functions taking no arguments) at the same time and return their results in order.
+
+        The first call is made in the current thread while the others run in the pool. Once they've all finished, if
+        any of them raised, the exception from the first of those is raised here.
+        """
+        futures = [self.submit(call) for call in calls[1:]]
+        futures.insert(0, self._call_now(calls[0]))
+        wait(futures)
+        return [future.result() for future in futures]
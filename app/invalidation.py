@@ -0,0 +1,98 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+import redis
+
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidationBus(object):
+    """Tells every node when a brief has changed, so that each of them can forget anything it has cached about it.
+
+    The data API client calls ``brief_changed`` whenever it has changed a brief. That runs each handler
+    registered with ``subscribe`` on this node straight away, so a buyer never sees stale data after their own write,
+    and publishes the change on a Redis channel. Every other node listens on the channel in a background thread
+    (started by its first request, so that it belongs to the worker process rather than one that forked it) and runs
+    its own handlers in turn.
+
+    Handlers are called with the brief's id and the ids of its users. Without a Redis connection (e.g. in tests) only
+    the handlers on this node are run.
+    """
+
+    CHANNEL = 'briefs-frontend:invalidation'
+    RECONNECT_DELAY = 5
+
+    def __init__(self, redis_connection=None):
+        self.redis = redis_connection
+        self.node_id = uuid.uuid4().hex
+        self._handlers = []
+        self._listener = None
+        self._listener_pid = None
+        self._listener_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.redis = app.config.get('SESSION_REDIS')
+        app.before_request(self.start_listening)
+
+    def subscribe(self, handler):
+        """Call `handler(brief_id, user_ids)` whenever a brief changes. Can be used as a decorator."""
+        self._handlers.append(handler)
+        return handler
+
+    def brief_changed(self, brief):
+        """Tell every node that `brief` (the brief as returned by the API) has changed"""
+        brief_id = brief['id']
+        user_ids = [user['id'] for user in brief.get('users', [])]
+        self._run_handlers(brief_id, user_ids)
+
+        if self.redis is not None:
+            message = json.dumps({'node': self.node_id, 'briefId': brief_id, 'userIds': user_ids})
+            try:
+                self.redis.publish(self.CHANNEL, message)
+            except redis.RedisError as e:
+                logger.warning("Failed to publish change to brief %s: %s", brief_id, e)
+
+    def _run_handlers(self, brief_id, user_ids):
+        for handler in self._handlers:
+            try:
+                handler(brief_id, user_ids)
+            except Exception:
+                logger.exception("Failed to handle change to brief %s", brief_id)
+
+    def start_listening(self):
+        if self.redis is None:
+            return
+        with self._listener_lock:
+            if self._listener is not None and self._listener.is_alive() and self._listener_pid == os.getpid():
+                return
+            self._listener = threading.Thread(target=self._listen, name='invalidation-bus', daemon=True)
+            self._listener_pid = os.getpid()
+            self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.CHANNEL)
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None and message['type'] == 'message':
+                        self._handle_message(message['data'])
+            except redis.RedisError as e:
+                logger.warning("Lost connection to the invalidation channel, reconnecting: %s", e)
+                time.sleep(self.RECONNECT_DELAY)
+
+    def _handle_message(self, data):
+        try:
+            message = json.loads(data)
+        except ValueError:
+            logger.warning("Ignoring malformed invalidation message %r", data)
+            return
+        # this node ran its handlers when it published the change
+        if message.get('node') != self.node_id:
+            self._run_handlers(message['briefId'], message['userIds'])
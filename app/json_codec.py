@@ -0,0 +1,40 @@
+import json
+from collections import OrderedDict, namedtuple
+
+
+JSONCodec = namedtuple('JSONCodec', ['name', 'loads'])
+
+STDLIB_JSON_CODEC = JSONCodec('json', json.loads)
+
+
+def _load_orjson():
+    import orjson
+    return JSONCodec('orjson', orjson.loads)
+
+
+def _load_ujson():
+    import ujson
+    return JSONCodec('ujson', ujson.loads)
+
+
+# fastest first; each decodes the raw bytes of a response and raises a ValueError for anything that isn't JSON
+JSON_CODEC_LOADERS = OrderedDict([
+    ('orjson', _load_orjson),
+    ('ujson', _load_ujson),
+    ('json', lambda: STDLIB_JSON_CODEC),
+])
+
+
+def get_json_codec(name=None):
+    """Return the JSON codec called `name`, or the fastest one installed if no name is given.
+
+    Only the standard library's is always available; asking for another that isn't installed raises ImportError.
+    """
+    if name is not None:
+        return JSON_CODEC_LOADERS[name]()
+
+    for load_codec in JSON_CODEC_LOADERS.values():
+        try:
+            return load_codec()
+        except ImportError:
+            pass
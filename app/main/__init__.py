@@ -1,67 +1,108 @@
-from copy import deepcopy
 from functools import partial
 
 from flask import Blueprint
-from werkzeug.local import Local, LocalProxy
 
-from dmcontent.content_loader import ContentLoader
 from dmutils.access_control import require_login
-from dmutils.timing import logged_duration
+
+from app import invalidation_bus
+from .helpers.buyers_helpers import (
+    configure_brief_list_cache,
+    configure_dashboard_totals_cache,
+    configure_framework_cache,
+    invalidate_dashboard_totals,
+)
+from .helpers.shared_content_loader import SharedContentLoader
 
 
 main = Blueprint('buyers', __name__)
 dos = Blueprint('dos', __name__)
 
-# we use our own Local for objects we explicitly want to be able to retain between requests but shouldn't
-# share a common object between concurrent threads/contexts
-_local = Local()
-
-
-def _make_content_loader_factory():
-    master_cl = ContentLoader('app/content')
-    master_cl.load_manifest('digital-outcomes-and-specialists', 'briefs', 'edit_brief')
-    master_cl.load_manifest('digital-outcomes-and-specialists', 'brief-responses', 'output_brief_response')
-    master_cl.load_manifest('digital-outcomes-and-specialists', 'brief-responses', 'legacy_output_brief_response')
-    master_cl.load_manifest('digital-outcomes-and-specialists', 'clarification_question', 'clarification_question')
-    master_cl.load_manifest('digital-outcomes-and-specialists', 'briefs', 'award_brief')
-
-    master_cl.load_manifest('digital-outcomes-and-specialists-2', 'briefs', 'edit_brief')
-    master_cl.load_manifest('digital-outcomes-and-specialists-2', 'brief-responses', 'output_brief_response')
-    master_cl.load_manifest('digital-outcomes-and-specialists-2', 'clarification_question', 'clarification_question')
-    master_cl.load_manifest('digital-outcomes-and-specialists-2', 'briefs', 'award_brief')
-
-    master_cl.load_manifest('digital-outcomes-and-specialists-3', 'briefs', 'edit_brief')
-    master_cl.load_manifest('digital-outcomes-and-specialists-3', 'brief-responses', 'output_brief_response')
-    master_cl.load_manifest('digital-outcomes-and-specialists-3', 'clarification_question', 'clarification_question')
-    master_cl.load_manifest('digital-outcomes-and-specialists-3', 'briefs', 'award_brief')
-
-    master_cl.load_manifest('digital-outcomes-and-specialists-4', 'briefs', 'edit_brief')
-    master_cl.load_manifest('digital-outcomes-and-specialists-4', 'briefs', 'display_brief')
-    master_cl.load_manifest('digital-outcomes-and-specialists-4', 'brief-responses', 'output_brief_response')
-    master_cl.load_manifest('digital-outcomes-and-specialists-4', 'clarification_question', 'clarification_question')
-    master_cl.load_manifest('digital-outcomes-and-specialists-4', 'briefs', 'award_brief')
-
-    master_cl.load_manifest('digital-outcomes-and-specialists-5', 'briefs', 'edit_brief')
-    master_cl.load_manifest('digital-outcomes-and-specialists-5', 'briefs', 'display_brief')
-    master_cl.load_manifest('digital-outcomes-and-specialists-5', 'brief-responses', 'output_brief_response')
-    master_cl.load_manifest('digital-outcomes-and-specialists-5', 'clarification_question', 'clarification_question')
-    master_cl.load_manifest('digital-outcomes-and-specialists-5', 'briefs', 'award_brief')
-
-    # seal master_cl in a closure by returning a function which will only ever return an independent copy of it
-    return lambda: deepcopy(master_cl)
-
-
-_content_loader_factory = _make_content_loader_factory()
-
-
-@logged_duration(message="Spent {duration_real}s in get_content_loader")
-def get_content_loader():
-    if not hasattr(_local, "content_loader"):
-        _local.content_loader = _content_loader_factory()
-    return _local.content_loader
-
-
-content_loader = LocalProxy(get_content_loader)
+# written by scripts/build_content_snapshot.py when the app is built
+CONTENT_SNAPSHOT_PATH = 'app/content/snapshot.pickle'
+
+# (question set, manifest) pairs used by each framework
+CONTENT_MANIFESTS = {
+    'digital-outcomes-and-specialists': [
+        ('briefs', 'edit_brief'),
+        ('brief-responses', 'output_brief_response'),
+        ('brief-responses', 'legacy_output_brief_response'),
+        ('clarification_question', 'clarification_question'),
+        ('briefs', 'award_brief'),
+    ],
+    'digital-outcomes-and-specialists-2': [
+        ('briefs', 'edit_brief'),
+        ('brief-responses', 'output_brief_response'),
+        ('clarification_question', 'clarification_question'),
+        ('briefs', 'award_brief'),
+    ],
+    'digital-outcomes-and-specialists-3': [
+        ('briefs', 'edit_brief'),
+        ('brief-responses', 'output_brief_response'),
+        ('clarification_question', 'clarification_question'),
+        ('briefs', 'award_brief'),
+    ],
+    'digital-outcomes-and-specialists-4': [
+        ('briefs', 'edit_brief'),
+        ('briefs', 'display_brief'),
+        ('brief-responses', 'output_brief_response'),
+        ('clarification_question', 'clarification_question'),
+        ('briefs', 'award_brief'),
+    ],
+    'digital-outcomes-and-specialists-5': [
+        ('briefs', 'edit_brief'),
+        ('briefs', 'display_brief'),
+        ('brief-responses', 'output_brief_response'),
+        ('clarification_question', 'clarification_question'),
+        ('briefs', 'award_brief'),
+    ],
+}
+
+
+def _make_content_loader():
+    master_cl = SharedContentLoader('app/content')
+    for framework_slug, manifests in CONTENT_MANIFESTS.items():
+        for question_set, manifest in manifests:
+            master_cl.register_manifest(framework_slug, question_set, manifest)
+
+    # if it's up to date, the snapshot lets us skip parsing YAML when manifests and messages are loaded
+    master_cl.load_snapshot(CONTENT_SNAPSHOT_PATH)
+
+    # messages are indexed when the loader is frozen, so load everything the views need from them up front
+    for framework_slug in CONTENT_MANIFESTS:
+        master_cl.load_messages(framework_slug, ['urls'])
+
+    # manifests are only parsed the first time they're asked for (or when preloaded below), and loaded content is
+    # never modified, so a single instance is shared by every thread rather than each one taking its own deep copy
+    return master_cl.freeze()
+
+
+content_loader = _make_content_loader()
+
+
+@main.record_once
+def preload_content(state):
+    content_loader.preload(state.app.config['DM_PRELOAD_CONTENT_FRAMEWORKS'])
+
+
+@main.record_once
+def init_framework_cache(state):
+    configure_framework_cache(state.app)
+
+
+@main.record_once
+def init_dashboard_totals_cache(state):
+    configure_dashboard_totals_cache(state.app)
+
+
+@main.record_once
+def init_brief_list_cache(state):
+    configure_brief_list_cache(state.app)
+
+
+@invalidation_bus.subscribe
+def forget_dashboard_totals(brief_id, user_ids):
+    for user_id in user_ids:
+        invalidate_dashboard_totals(user_id)
 
 
 main.before_request(partial(require_login, role='buyer'))
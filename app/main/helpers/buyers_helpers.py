@@ -1,11 +1,54 @@
+import hashlib
+import json
+from collections import OrderedDict, namedtuple
+from functools import partial
+from threading import Lock
+from weakref import WeakKeyDictionary
+
 from flask import abort
 
+from dmcontent.questions import Date, List, Multiquestion, Pricing, Question
+
+from ...caching import LRUCache, TTLCache
+
+
+CachedFramework = namedtuple('CachedFramework', ['framework', 'lots'])
+
+# Framework documents only change a few times a year, so they're shared between every request a worker handles.
+# The cache is off until configure_framework_cache is called; call invalidate_cached_frameworks after changing a
+# framework to have the next request fetch it again.
+framework_cache = TTLCache()
+
+
+def configure_framework_cache(app):
+    framework_cache.configure(app.config['DM_FRAMEWORK_CACHE_TTL'], app.config['DM_FRAMEWORK_CACHE_STALE_TTL'])
 
-def get_framework_and_lot(framework_slug, lot_slug, data_api_client, allowed_statuses=None, must_allow_brief=False):
+
+def invalidate_cached_frameworks(framework_slug=None):
+    framework_cache.invalidate(framework_slug)
+
+
+def _fetch_framework(framework_slug, data_api_client):
     framework = data_api_client.get_framework(framework_slug)['frameworks']
-    try:
-        lot = next(lot for lot in framework['lots'] if lot['slug'] == lot_slug)
-    except StopIteration:
+    return CachedFramework(framework, {lot['slug']: lot for lot in framework['lots']})
+
+
+def get_framework_and_lot(
+    framework_slug, lot_slug, data_api_client, allowed_statuses=None, must_allow_brief=False, brief_id=None,
+):
+    # if the view is going to need the brief too, fetch it in the same round trip as the framework
+    if brief_id is not None and framework_slug not in framework_cache:
+        data_api_client.prefetch(
+            lambda: data_api_client.get_framework(framework_slug),
+            lambda: data_api_client.get_brief(brief_id),
+        )
+
+    # the framework and lot may be shared with other requests, so must be treated as read-only
+    framework, lots = framework_cache.get_or_set(
+        framework_slug, lambda: _fetch_framework(framework_slug, data_api_client)
+    )
+    lot = lots.get(lot_slug)
+    if lot is None:
         abort(404)
 
     if allowed_statuses and framework['status'] not in allowed_statuses:
@@ -16,6 +59,103 @@ def get_framework_and_lot(framework_slug, lot_slug, data_api_client, allowed_sta
     return framework, lot
 
 
+DashboardTotals = namedtuple('DashboardTotals', ['briefs', 'projects_awaiting_outcomes', 'has_projects'])
+
+# The counts on a buyer's account home page, kept per user for a short while (for at most
+# DM_DASHBOARD_TOTALS_CACHE_SIZE users at once). Every change to one of a user's briefs forgets theirs (see
+# app/main/__init__.py); changes to their projects are only picked up when the TTL runs out.
+dashboard_totals_cache = TTLCache()
+
+
+def configure_dashboard_totals_cache(app):
+    dashboard_totals_cache.configure(
+        app.config['DM_DASHBOARD_TOTALS_CACHE_TTL'], maxsize=app.config['DM_DASHBOARD_TOTALS_CACHE_SIZE'],
+    )
+
+
+def invalidate_dashboard_totals(user_id=None):
+    dashboard_totals_cache.invalidate(user_id)
+
+
+def _fetch_dashboard_totals(user_id, data_api_client, api_executor):
+    # the call for all of the user's projects is only needed if they've no projects awaiting outcomes (which is
+    # usually the case), so it's made at the same time as the others rather than waiting to find out
+    projects_awaiting_outcomes = api_executor.submit(
+        data_api_client.find_direct_award_projects,
+        user_id,
+        locked=True,
+        having_outcome=False,
+    )
+    all_projects = api_executor.submit(data_api_client.find_direct_award_projects, user_id)
+    briefs_total = data_api_client.find_briefs(user_id, fields=['id'])["meta"]["total"]
+
+    projects_awaiting_outcomes_total = projects_awaiting_outcomes.result()["meta"]["total"]
+    if projects_awaiting_outcomes_total:
+        all_projects.cancel()
+
+    return DashboardTotals(
+        briefs=briefs_total,
+        projects_awaiting_outcomes=projects_awaiting_outcomes_total,
+        has_projects=bool(projects_awaiting_outcomes_total or all_projects.result()["meta"]["total"]),
+    )
+
+
+def get_dashboard_totals(user_id, data_api_client, api_executor):
+    return dashboard_totals_cache.get_or_set(
+        user_id, lambda: _fetch_dashboard_totals(user_id, data_api_client, api_executor)
+    )
+
+
+# The fields of every one of a user's briefs fetched to tell whether their lists of briefs have changed
+BRIEF_VERSION_FIELDS = ['id', 'status', 'updatedAt']
+
+# Each list of a user's briefs, kept against a version made from the id and updatedAt of every brief on it. Off
+# until configure_brief_list_cache is called, and for as long as the data API can't leave out the fields that
+# aren't in BRIEF_VERSION_FIELDS (without that, telling whether a list has changed means fetching it in full).
+brief_list_cache = LRUCache(0)
+
+
+def configure_brief_list_cache(app):
+    brief_list_cache.maxsize = (
+        app.config['DM_BRIEF_LIST_CACHE_SIZE'] if app.config['DM_DATA_API_SUPPORTS_PROJECTION'] else 0
+    )
+    brief_list_cache.clear()
+
+
+def _get_brief_list_version(briefs):
+    versions = sorted((brief['id'], brief.get('updatedAt') or '') for brief in briefs)
+    return hashlib.sha1(json.dumps(versions).encode('utf-8')).hexdigest()
+
+
+def find_user_briefs(user_id, brief_lists, data_api_client, api_executor):
+    """Return a list of the user's briefs for each of `brief_lists`, (statuses, fields) pairs giving the statuses of
+    the briefs to list and the fields of each of them needed (None for all of them).
+
+    If the brief list cache is on, a list is only fetched if a brief on it has been added, removed or updated since
+    it was last fetched: a single request for just the id, status and updatedAt of each of the user's briefs tells
+    whether that's the case. Otherwise every one of the user's briefs is fetched in full in a single request and the
+    lists are made from that.
+    """
+    if not brief_list_cache.maxsize:
+        user_briefs = data_api_client.find_briefs(user_id).get('briefs', [])
+        return [[brief for brief in user_briefs if brief['status'] in statuses] for statuses, fields in brief_lists]
+
+    brief_versions = data_api_client.find_briefs(user_id, fields=BRIEF_VERSION_FIELDS).get('briefs', [])
+
+    def find_briefs(statuses, fields):
+        version = _get_brief_list_version(brief for brief in brief_versions if brief['status'] in statuses)
+        return brief_list_cache.get_or_set(
+            (user_id, tuple(statuses), tuple(fields or ()), version),
+            lambda: data_api_client.find_briefs(user_id, status=','.join(statuses), fields=fields).get('briefs', []),
+        )
+
+    # cached briefs are shared with other requests, so each caller gets copies it can change
+    return [
+        [dict(brief) for brief in briefs]
+        for briefs in api_executor.run(*(partial(find_briefs, statuses, fields) for statuses, fields in brief_lists))
+    ]
+
+
 def is_brief_correct(brief, framework_slug, lot_slug, current_user_id, allow_withdrawn=False, allowed_statuses=None):
     return (
         brief['frameworkSlug'] == framework_slug
@@ -44,16 +184,239 @@ def section_has_at_least_one_required_question(section):
     return len(required_questions) > 0
 
 
+SectionCompleteness = namedtuple('SectionCompleteness', ['unanswered_required', 'unanswered_optional', 'status'])
+
+
+class BriefCompleteness(object):
+    """Unanswered question counts and statuses for each section of a brief summary, and for the brief as a whole.
+
+    Each question is only looked at once, however many of these figures a view needs.
+    """
+
+    def __init__(self, sections):
+        self.sections = OrderedDict()
+        self.unanswered_required, self.unanswered_optional = (0, 0)
+
+        for section in sections:
+            unanswered_required, unanswered_optional = (0, 0)
+            section_is_empty = True
+            for question in section.questions:
+                question_is_empty = question.is_empty
+                if question.answer_required:
+                    unanswered_required += 1
+                elif question_is_empty:
+                    unanswered_optional += 1
+                section_is_empty = section_is_empty and question_is_empty
+
+            self.sections[section.slug] = SectionCompleteness(
+                unanswered_required,
+                unanswered_optional,
+                self._section_status(section_is_empty, unanswered_required, unanswered_optional),
+            )
+            self.unanswered_required += unanswered_required
+            self.unanswered_optional += unanswered_optional
+
+    @staticmethod
+    def _section_status(section_is_empty, unanswered_required, unanswered_optional):
+        if unanswered_required > 0:
+            return 'to_do' if section_is_empty else 'in_progress'
+        if not section_is_empty:
+            return 'done'
+        if unanswered_optional > 0:
+            return 'optional'
+        return None
+
+    @property
+    def previewable(self):
+        return self.unanswered_required == 0
+
+    @property
+    def publishable(self):
+        return self.unanswered_required == 0
+
+    @property
+    def sections_status(self):
+        """Status of each section by slug, along with whether the brief is previewable and publishable"""
+        sections_status = {
+            'previewable': self.previewable,
+            'publishable': self.publishable,
+        }
+        sections_status.update(
+            (slug, section.status) for slug, section in self.sections.items() if section.status is not None
+        )
+        return sections_status
+
+
+def get_brief_completeness(sections):
+    return BriefCompleteness(sections)
+
+
 def count_unanswered_questions(sections):
-    unanswered_required, unanswered_optional = (0, 0)
-    for section in sections:
-        for question in section.questions:
-            if question.answer_required:
+    completeness = get_brief_completeness(sections)
+    return completeness.unanswered_required, completeness.unanswered_optional
+
+
+class UnansweredQuestionIndex(object):
+    """The questions of a filtered manifest, compiled for counting a brief's unanswered questions without a summary.
+
+    Most questions are unanswered exactly when the brief's value for them is empty, so all that's kept for those is
+    their id and whether they're optional. Anything more involved (multiquestions, pricing, questions with units or
+    assurance...) is checked using a summary of that question alone, so the counts always match those given by
+    ``count_unanswered_questions``.
+    """
+
+    EMPTY_VALUES = ('', [], None)
+
+    def __init__(self, content):
+        self._plain_questions = []
+        self._other_questions = []
+
+        for section in content:
+            for question in section.questions:
+                if self._is_plain_question(question):
+                    self._plain_questions.append((question.id, bool(question.get('optional'))))
+                else:
+                    self._other_questions.append(question)
+
+    @staticmethod
+    def _is_plain_question(question):
+        # these are the question types whose summary value is the brief's value (or a label for it) unchanged
+        return (
+            type(question) in (Question, List, Date)
+            and not question.has_assurance()
+            and not (question.type == 'number' and question.get('unit'))
+            and not question.get('before_summary_value')
+        )
+
+    def count_unanswered_questions(self, brief):
+        unanswered_required, unanswered_optional = (0, 0)
+
+        for question_id, optional in self._plain_questions:
+            if brief.get(question_id, '') in self.EMPTY_VALUES:
+                if optional:
+                    unanswered_optional += 1
+                else:
+                    unanswered_required += 1
+
+        for question in self._other_questions:
+            question_summary = question.summary(brief)
+            if question_summary.answer_required:
                 unanswered_required += 1
-            elif question.value in ['', [], None]:
+            elif question_summary.is_empty:
                 unanswered_optional += 1
 
-    return unanswered_required, unanswered_optional
+        return unanswered_required, unanswered_optional
+
+
+class ManifestIndex(object):
+    """Lookups of a manifest's sections by slug and questions by id, built in a single pass over the manifest.
+
+    Questions nested in multiquestions are included, as are the field names of pricing questions, and where an id
+    appears more than once the first occurrence wins, so lookups give the same results as the manifest's own
+    ``get_section``/``get_question``.
+    """
+
+    def __init__(self, content):
+        self._sections = {}
+        self._questions = {}
+        self._section_questions = {}
+
+        for section in content:
+            self._sections.setdefault(section.slug, section)
+            for question in section.questions:
+                if isinstance(question, Multiquestion):
+                    field_questions = [(question.id, question)] + [
+                        (nested_question.id, nested_question) for nested_question in question.questions
+                    ]
+                elif isinstance(question, Pricing):
+                    field_questions = [(question.id, question)] + [
+                        (field_name, question) for field_name in question.fields.values()
+                    ]
+                else:
+                    field_questions = [(question.id, question)]
+
+                for field_name, field_question in field_questions:
+                    self._questions.setdefault(field_name, (section, field_question))
+                    self._section_questions.setdefault((section.slug, field_name), field_question)
+
+    def get_section(self, section_slug):
+        return self._sections.get(section_slug)
+
+    def get_question(self, question_id, section_slug=None):
+        """Return the question with the given id, only looking in the given section if there is one"""
+        if section_slug is not None:
+            return self._section_questions.get((section_slug, question_id))
+        return self._questions.get(question_id, (None, None))[1]
+
+    def get_question_section(self, question_id):
+        """Return the section containing the question with the given id"""
+        return self._questions.get(question_id, (None, None))[0]
+
+
+_manifest_lookups = WeakKeyDictionary()
+_manifest_lookups_lock = Lock()
+
+
+def _get_manifest_lookup(content, lookup_class, make_lookup):
+    # lookups are built once for each manifest object, so the cached manifests handed out by the shared content
+    # loader only ever get indexed once, and a lookup goes away along with the manifest it was built for
+    with _manifest_lookups_lock:
+        lookups = _manifest_lookups.get(content, {})
+        if lookup_class in lookups:
+            return lookups[lookup_class]
+
+    lookup = make_lookup(content)
+
+    with _manifest_lookups_lock:
+        _manifest_lookups.setdefault(content, {})[lookup_class] = lookup
+    return lookup
+
+
+def get_manifest_index(content):
+    """The ManifestIndex for a manifest (filtered or summarised)"""
+    return _get_manifest_lookup(content, ManifestIndex, ManifestIndex)
+
+
+def _answer_plain_question(question):
+    # an answer of the shape a brief would give a question that UnansweredQuestionIndex checks by value alone
+    if question.type in ('list', 'checkboxes'):
+        return ['Yes']
+    if question.type == 'boolean':
+        return True
+    if question.type == 'number':
+        return 1
+    if question.type == 'date':
+        return '2016-01-01'
+    return 'Yes'
+
+
+def _make_unanswered_question_index(content):
+    index = UnansweredQuestionIndex(content)
+    answered_brief = {
+        question.id: _answer_plain_question(question)
+        for section in content
+        for question in section.questions
+        if UnansweredQuestionIndex._is_plain_question(question)
+    }
+
+    for brief in ({}, answered_brief):
+        try:
+            summary_counts = count_unanswered_questions(content.summary(brief))
+        except Exception:
+            # the made-up answers were more than the manifest's summary could handle, so the index can't be checked
+            return None
+        if index.count_unanswered_questions(brief) != summary_counts:
+            return None
+    return index
+
+
+def get_unanswered_question_index(content):
+    """The UnansweredQuestionIndex for a filtered manifest, or None if it can't be used for it.
+
+    Each index is checked against the summaries of an empty brief and of one answering every question it checks by
+    value when it's built, and isn't used if they disagree on either.
+    """
+    return _get_manifest_lookup(content, UnansweredQuestionIndex, _make_unanswered_question_index)
 
 
 def add_unanswered_counts_to_briefs(briefs, content_loader):
@@ -61,8 +424,11 @@ def add_unanswered_counts_to_briefs(briefs, content_loader):
         content = content_loader.get_manifest(brief.get('frameworkSlug'), 'edit_brief').filter(
             {'lot': brief.get('lotSlug')}
         )
-        sections = content.summary(brief)
-        unanswered_required, unanswered_optional = count_unanswered_questions(sections)
+        index = get_unanswered_question_index(content)
+        if index is not None:
+            unanswered_required, unanswered_optional = index.count_unanswered_questions(brief)
+        else:
+            unanswered_required, unanswered_optional = count_unanswered_questions(content.summary(brief))
         brief['unanswered_required'] = unanswered_required
         brief['unanswered_optional'] = unanswered_optional
 
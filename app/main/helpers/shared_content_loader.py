@@ -0,0 +1,348 @@
+import copy
+import copyreg
+import hashlib
+import io
+import logging
+import os
+import pickle
+import threading
+
+import dmcontent
+from dmcontent.content_loader import ContentLoader, ContentManifest
+from dmcontent.errors import ContentNotFoundError
+from dmcontent.messages import ContentMessage
+from dmcontent.utils import TemplateField
+
+from ...caching import LRUCache
+
+
+logger = logging.getLogger(__name__)
+
+# bump this whenever the layout of the snapshot changes so that old snapshots are treated as stale
+SNAPSHOT_FORMAT_VERSION = 1
+
+# there are only a handful of frameworks, manifests and lots, so this comfortably holds every combination in use
+FILTERED_MANIFEST_CACHE_SIZE = 256
+# enough for the briefs being actively worked on at any one time
+BRIEF_SUMMARY_CACHE_SIZE = 128
+
+
+class ContentLoaderFrozenError(RuntimeError):
+    pass
+
+
+# every TemplateField converts markdown with the same shared Markdown instance, which isn't thread-safe
+_make_template_lock = threading.Lock()
+
+
+class _LazyTemplateField(TemplateField):
+    """A TemplateField restored from a snapshot, which only compiles its template the first time it's rendered.
+
+    That can happen in any thread, so templates are compiled one at a time.
+    """
+
+    def __init__(self, source, markdown):
+        self.source = source
+        self.markdown = markdown
+
+    def __getattr__(self, key):
+        # only reached while `template` hasn't been set yet
+        if key != 'template':
+            raise AttributeError(key)
+
+        with _make_template_lock:
+            # another thread may have compiled it while we were waiting for the lock
+            if 'template' not in self.__dict__:
+                self.template = self.make_template(self.source)
+        return self.__dict__['template']
+
+
+def _reduce_template_field(field):
+    return _LazyTemplateField, (field.source, field.markdown)
+
+
+def _dump_content(content):
+    # compiled jinja templates can't be pickled, so store the template source and recompile it when it's needed
+    buffer = io.BytesIO()
+    pickler = pickle.Pickler(buffer, protocol=pickle.HIGHEST_PROTOCOL)
+    pickler.dispatch_table = copyreg.dispatch_table.copy()
+    pickler.dispatch_table[TemplateField] = _reduce_template_field
+    pickler.dispatch_table[_LazyTemplateField] = _reduce_template_field
+    pickler.dump(content)
+    return buffer.getvalue()
+
+
+class SharedContentManifest(ContentManifest):
+    """A manifest handed out by a SharedContentLoader, which memoizes filtering it by lot.
+
+    Filtering on nothing but the lot always gives the same result, so the filtered manifest is built once and the
+    same instance is returned to every caller after that. It's shared between threads and so must be treated as
+    read-only. Any other filter context (e.g. one including brief data) is filtered afresh every time.
+    """
+
+    def __init__(self, sections, framework_slug, manifest_name, filtered_manifests, brief_summaries):
+        super().__init__(sections)
+        self.framework_slug = framework_slug
+        self.manifest_name = manifest_name
+        self._filtered_manifests = filtered_manifests
+        self._brief_summaries = brief_summaries
+
+    def filter(self, context, dynamic=True, inplace_allowed=False):
+        if inplace_allowed or not set(context) <= {'lot'}:
+            return super().filter(context, dynamic=dynamic, inplace_allowed=inplace_allowed)
+
+        key = (self.framework_slug, self.manifest_name, context.get('lot'), dynamic)
+        return self._filtered_manifests.get_or_set(
+            key,
+            lambda: FilteredContentManifest(
+                super(SharedContentManifest, self).filter(context, dynamic=dynamic).sections,
+                key,
+                self._brief_summaries,
+            ),
+        )
+
+
+class FilteredContentManifest(ContentManifest):
+    """A cached SharedContentManifest filtered by lot, which memoizes summaries of briefs.
+
+    A brief's summary only changes when the brief does, so it's cached against the brief's id and ``updatedAt``
+    alongside the framework, manifest and lot. Like the filtered manifest itself, a cached summary is shared between
+    requests and threads and must be treated as read-only. The summary is built from a copy of the brief so that
+    changes the caller makes to its brief afterwards don't leak into it.
+    """
+
+    def __init__(self, sections, filter_key, brief_summaries):
+        super().__init__(sections)
+        self._filter_key = filter_key
+        self._brief_summaries = brief_summaries
+
+    def summary(self, service_data, inplace_allowed=False):
+        if inplace_allowed or not service_data.get('id') or not service_data.get('updatedAt'):
+            return super().summary(service_data, inplace_allowed=inplace_allowed)
+
+        return self._brief_summaries.get_or_set(
+            self._filter_key + (service_data['id'], service_data['updatedAt']),
+            lambda: super(FilteredContentManifest, self).summary(copy.deepcopy(service_data)),
+        )
+
+
+class SharedContentLoader(ContentLoader):
+    """A ContentLoader which can be shared between all threads of a worker.
+
+    Manifests are registered at startup and parsed on demand: the first ``get_manifest`` call for a registered
+    manifest loads it (only one thread does the parsing, any others asking for it at the same time wait for the
+    result), unless it has already been loaded by ``preload``. If a snapshot built by ``write_snapshot`` has been
+    loaded and still matches the content on disk, manifests and messages are restored from it instead of YAML.
+
+    Once everything has been registered the loader is frozen, after which any attempt to register or load content
+    that wasn't registered beforehand raises a ``ContentLoaderFrozenError``. Nothing mutates loaded content:
+    ``get_manifest`` hands out a fresh ``ContentManifest`` wrapping the shared section data, and ``filter``/``summary``
+    build new manifest objects on top of it, so per-request work never needs its own copy of the loader.
+
+    Messages are expected to be loaded before the loader is frozen, at which point they're indexed so that
+    ``get_message`` for a specific key is a single dict lookup.
+
+    Manifests filtered by lot alone are cached in ``filtered_manifests`` (see ``SharedContentManifest``), and
+    summaries of briefs made from those in ``brief_summaries`` (see ``FilteredContentManifest``). The first editable
+    section of each of those filtered manifests is kept in ``first_editable_sections``, which ``preload`` fills in
+    for every lot the preloaded manifests depend on. Loaded content never changes, so none of these ever need
+    invalidating.
+    """
+
+    def __init__(self, content_path):
+        super().__init__(content_path)
+        self._frozen = False
+        self._registered_manifests = {}
+        self._snapshot_manifests = {}
+        self._message_index = {}
+        self._load_lock = threading.Lock()
+        self.filtered_manifests = LRUCache(FILTERED_MANIFEST_CACHE_SIZE)
+        self.brief_summaries = LRUCache(BRIEF_SUMMARY_CACHE_SIZE)
+        self.first_editable_sections = LRUCache(FILTERED_MANIFEST_CACHE_SIZE)
+
+    @property
+    def frozen(self):
+        return self._frozen
+
+    def freeze(self):
+        self._frozen = True
+        self._index_messages()
+        return self
+
+    def _index_messages(self):
+        # messages can't change once we're frozen, so look each one up now and keep the results in a flat dict
+        self._message_index = {
+            (framework_slug, block, key): ContentMessage(data).get(key)
+            for framework_slug, blocks in self._messages.items()
+            for block, data in blocks.items()
+            for key in data
+        }
+
+    def get_message(self, framework_slug, block, key=None):
+        if key is not None:
+            try:
+                return self._message_index[(framework_slug, block, key)]
+            except KeyError:
+                pass
+        return super().get_message(framework_slug, block, key)
+
+    def register_manifest(self, framework_slug, question_set, manifest):
+        if self._frozen:
+            raise ContentLoaderFrozenError(
+                "Cannot register manifest {} for {} with a frozen content loader".format(manifest, framework_slug)
+            )
+        self._registered_manifests[(framework_slug, manifest)] = question_set
+
+    def is_manifest_loaded(self, framework_slug, manifest):
+        return manifest in self._content.get(framework_slug, {})
+
+    def preload(self, framework_slugs):
+        """Load every registered manifest for the given frameworks now rather than on first use"""
+        for (framework_slug, manifest), question_set in self._registered_manifests.items():
+            if framework_slug in framework_slugs:
+                self.load_manifest(framework_slug, question_set, manifest)
+                for lot_slug in self._get_lot_slugs(framework_slug, manifest):
+                    self.get_first_editable_section(framework_slug, manifest, lot_slug)
+
+    def _get_lot_slugs(self, framework_slug, manifest):
+        return sorted({
+            lot_slug
+            for section in self._content[framework_slug][manifest]
+            for question in section['questions']
+            for depends in question.get('depends') or []
+            if depends.get('on') == 'lot'
+            for lot_slug in depends.get('being', [])
+        })
+
+    def get_first_editable_section(self, framework_slug, manifest, lot_slug):
+        """The first editable section of a manifest filtered by lot, where a new brief's first question is found"""
+        def make_section():
+            content = self.get_manifest(framework_slug, manifest).filter({'lot': lot_slug})
+            return content.get_section(content.get_next_editable_section_id())
+
+        return self.first_editable_sections.get_or_set((framework_slug, manifest, lot_slug), make_section)
+
+    def get_manifest(self, framework_slug, manifest):
+        if not self.is_manifest_loaded(framework_slug, manifest):
+            question_set = self._registered_manifests.get((framework_slug, manifest))
+            if question_set is not None:
+                self.load_manifest(framework_slug, question_set, manifest)
+
+        try:
+            sections = self._content[framework_slug][manifest]
+        except KeyError:
+            raise ContentNotFoundError("Content not found for {} and {}".format(framework_slug, manifest))
+
+        return SharedContentManifest(
+            sections, framework_slug, manifest, self.filtered_manifests, self.brief_summaries
+        )
+
+    def load_manifest(self, framework_slug, question_set, manifest):
+        if self.is_manifest_loaded(framework_slug, manifest):
+            return
+
+        if self._frozen and self._registered_manifests.get((framework_slug, manifest)) != question_set:
+            raise ContentLoaderFrozenError(
+                "Cannot load manifest {} for {} into a frozen content loader".format(manifest, framework_slug)
+            )
+
+        with self._load_lock:
+            # another thread may have loaded it while we were waiting for the lock
+            if self.is_manifest_loaded(framework_slug, manifest):
+                return
+
+            snapshot = self._snapshot_manifests.get((framework_slug, question_set, manifest))
+            if snapshot is not None:
+                self._content[framework_slug][manifest] = pickle.loads(snapshot)
+                return self._content[framework_slug][manifest]
+
+            return super().load_manifest(framework_slug, question_set, manifest)
+
+    def load_messages(self, framework_slug, blocks):
+        if not isinstance(blocks, list):
+            raise TypeError('Content blocks must be a list')
+
+        # messages never change once loaded, so there's no need to read them again
+        missing_blocks = [block for block in blocks if block not in self._messages.get(framework_slug, {})]
+        if missing_blocks and self._frozen:
+            raise ContentLoaderFrozenError(
+                "Cannot load messages {} for {} into a frozen content loader".format(missing_blocks, framework_slug)
+            )
+        if missing_blocks:
+            super().load_messages(framework_slug, missing_blocks)
+
+    def load_metadata(self, framework_slug, blocks):
+        if self._frozen:
+            raise ContentLoaderFrozenError(
+                "Cannot load metadata {} for {} into a frozen content loader".format(blocks, framework_slug)
+            )
+        return super().load_metadata(framework_slug, blocks)
+
+    def content_hash(self, framework_slugs):
+        """A hash of every YAML file for the given frameworks, used to tell whether a snapshot is stale"""
+        hasher = hashlib.sha256()
+        hasher.update("{}:{}".format(SNAPSHOT_FORMAT_VERSION, dmcontent.__version__).encode('utf-8'))
+
+        for framework_slug in sorted(framework_slugs):
+            for dirpath, dirnames, filenames in os.walk(self._root_path(framework_slug)):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if not filename.endswith('.yml'):
+                        continue
+                    path = os.path.join(dirpath, filename)
+                    hasher.update(os.path.relpath(path, self.content_path).encode('utf-8'))
+                    with open(path, 'rb') as yaml_file:
+                        hasher.update(yaml_file.read())
+
+        return hasher.hexdigest()
+
+    def write_snapshot(self, snapshot_path):
+        """Load all registered manifests and write them, along with any loaded messages, to `snapshot_path`"""
+        for (framework_slug, manifest), question_set in self._registered_manifests.items():
+            self.load_manifest(framework_slug, question_set, manifest)
+
+        framework_slugs = sorted(
+            {framework_slug for framework_slug, manifest in self._registered_manifests}
+            | {framework_slug for framework_slug, blocks in self._messages.items() if blocks}
+        )
+        snapshot = {
+            'content_hash': self.content_hash(framework_slugs),
+            'framework_slugs': framework_slugs,
+            'manifests': {
+                (framework_slug, question_set, manifest): _dump_content(self._content[framework_slug][manifest])
+                for (framework_slug, manifest), question_set in self._registered_manifests.items()
+            },
+            'messages': {
+                framework_slug: _dump_content(dict(blocks))
+                for framework_slug, blocks in self._messages.items() if blocks
+            },
+        }
+
+        # write to a temporary file first so a worker starting up never sees a partially written snapshot
+        with open(snapshot_path + '.tmp', 'wb') as snapshot_file:
+            pickle.dump(snapshot, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(snapshot_path + '.tmp', snapshot_path)
+
+    def load_snapshot(self, snapshot_path):
+        """Use the snapshot at `snapshot_path` in place of YAML, as long as it still matches the content on disk
+
+        :return: whether the snapshot was used
+        """
+        try:
+            with open(snapshot_path, 'rb') as snapshot_file:
+                snapshot = pickle.load(snapshot_file)
+        except FileNotFoundError:
+            return False
+        except (pickle.UnpicklingError, EOFError) as e:
+            logger.warning("Ignoring unreadable content snapshot at %s: %s", snapshot_path, e)
+            return False
+
+        if snapshot.get('content_hash') != self.content_hash(snapshot.get('framework_slugs', [])):
+            logger.warning("Ignoring stale content snapshot at %s", snapshot_path)
+            return False
+
+        self._snapshot_manifests = snapshot['manifests']
+        for framework_slug, blocks in snapshot['messages'].items():
+            self._messages[framework_slug].update(pickle.loads(blocks))
+
+        return True
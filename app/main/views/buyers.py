@@ -1,13 +1,17 @@
 # coding: utf-8
 from __future__ import unicode_literals
 
-from flask import abort
+import math
+
+from flask import abort, request
 from flask_login import current_user
 
-from app import data_api_client
+from app import api_executor, data_api_client
 from .. import main, content_loader
 from ..helpers.buyers_helpers import (
     add_unanswered_counts_to_briefs,
+    find_user_briefs,
+    get_dashboard_totals,
     get_framework_and_lot,
     is_brief_correct,
     is_legacy_brief_response,
@@ -22,53 +26,75 @@ from collections import Counter
 CLOSED_BRIEF_STATUSES = ['closed', 'withdrawn', 'awarded', 'cancelled', 'unsuccessful']
 CLOSED_PUBLISHED_BRIEF_STATUSES = ['closed', 'awarded', 'cancelled', 'unsuccessful']
 
+CLOSED_BRIEFS_PER_PAGE = 20
+
+# the fields of a published brief needed to list it on the dashboard
+BRIEF_LIST_FIELDS = ['id', 'title', 'status', 'framework', 'lot', 'createdAt', 'publishedAt', 'applicationsClosedAt']
+# the fields of a brief response needed to count how many met the essential requirements
+BRIEF_RESPONSE_REQUIREMENTS_FIELDS = ['id', 'essentialRequirements', 'essentialRequirementsMet']
+
 
 @main.route('')
 def buyer_dashboard():
-    user_projects_awaiting_outcomes_total = data_api_client.find_direct_award_projects(
-        current_user.id,
-        locked=True,
-        having_outcome=False,
-    )["meta"]["total"]
+    totals = get_dashboard_totals(current_user.id, data_api_client, api_executor)
 
     return render_template(
         'buyers/index.html',
-        user_briefs_total=data_api_client.find_briefs(current_user.id)["meta"]["total"],
-        user_projects_awaiting_outcomes_total=user_projects_awaiting_outcomes_total,
-        # calculating it this way allows us to avoid the extra api call if we already know the user has projects
-        # from user_projects_awaiting_outcomes_total
-        user_has_projects=bool(
-            user_projects_awaiting_outcomes_total
-            or data_api_client.find_direct_award_projects(current_user.id)["meta"]["total"]
-        ),
+        user_briefs_total=totals.briefs,
+        user_projects_awaiting_outcomes_total=totals.projects_awaiting_outcomes,
+        user_has_projects=totals.has_projects,
     )
 
 
 @main.route('/requirements/digital-outcomes-and-specialists')
 def buyer_dos_requirements():
-    user_briefs = data_api_client.find_briefs(current_user.id).get('briefs', [])
+    closed_briefs_page = request.args.get('page', default=1, type=int)
+    if closed_briefs_page < 1:
+        abort(404)
+
+    # draft briefs are needed in full to count their unanswered questions, the others are only listed
+    user_draft_briefs, user_live_briefs, user_closed_briefs = find_user_briefs(
+        current_user.id,
+        [
+            (['draft'], None),
+            (['live'], BRIEF_LIST_FIELDS),
+            (CLOSED_BRIEF_STATUSES, BRIEF_LIST_FIELDS),
+        ],
+        data_api_client,
+        api_executor,
+    )
 
     draft_briefs = sorted(
-        add_unanswered_counts_to_briefs([brief for brief in user_briefs if brief['status'] == 'draft'], content_loader),
+        add_unanswered_counts_to_briefs(
+            [brief for brief in user_draft_briefs if brief['status'] == 'draft'], content_loader
+        ),
         key=lambda i: datetime.strptime(i['createdAt'], DATETIME_FORMAT),
         reverse=True
     )
     live_briefs = sorted(
-        [brief for brief in user_briefs if brief['status'] == 'live'],
+        [brief for brief in user_live_briefs if brief['status'] == 'live'],
         key=lambda i: datetime.strptime(i['publishedAt'], DATETIME_FORMAT),
         reverse=True
     )
+    # the API doesn't paginate briefs listed by user_id (it ignores `page` for them), so every closed brief is still
+    # fetched and sorted on every visit and only the rendering of them is paginated
     closed_briefs = sorted(
-        [brief for brief in user_briefs if brief['status'] in CLOSED_BRIEF_STATUSES],
+        [brief for brief in user_closed_briefs if brief['status'] in CLOSED_BRIEF_STATUSES],
         key=lambda i: datetime.strptime(i['applicationsClosedAt'], DATETIME_FORMAT),
         reverse=True
     )
+    closed_briefs_page_count = max(math.ceil(len(closed_briefs) / CLOSED_BRIEFS_PER_PAGE), 1)
+    if closed_briefs_page > closed_briefs_page_count:
+        abort(404)
+    page_start = (closed_briefs_page - 1) * CLOSED_BRIEFS_PER_PAGE
 
     return render_template(
         'buyers/dashboard.html',
         draft_briefs=draft_briefs,
         live_briefs=live_briefs,
-        closed_briefs=closed_briefs,
+        closed_briefs=closed_briefs[page_start:page_start + CLOSED_BRIEFS_PER_PAGE],
+        closed_briefs_page=closed_briefs_page,
+        closed_briefs_page_count=closed_briefs_page_count,
     )
 
 
@@ -80,6 +106,7 @@ def view_brief_responses(framework_slug, lot_slug, brief_id):
         data_api_client,
         allowed_statuses=['live', 'expired'],
         must_allow_brief=True,
+        brief_id=brief_id,
     )
     brief = data_api_client.get_brief(brief_id)["briefs"]
 
@@ -88,7 +115,9 @@ def view_brief_responses(framework_slug, lot_slug, brief_id):
     ):
         abort(404)
 
-    brief_responses = data_api_client.find_brief_responses(brief_id)['briefResponses']
+    brief_responses = data_api_client.find_brief_responses(
+        brief_id, fields=BRIEF_RESPONSE_REQUIREMENTS_FIELDS
+    )['briefResponses']
 
     brief_responses_required_evidence = (
         None
@@ -19,11 +19,7 @@ def start_new_brief(framework_slug, lot_slug):
     framework, lot = get_framework_and_lot(framework_slug, lot_slug, data_api_client,
                                            allowed_statuses=['live'], must_allow_brief=True)
 
-    content = content_loader.get_manifest(framework_slug, 'edit_brief').filter(
-        {'lot': lot['slug']}
-    )
-
-    section = content.get_section(content.get_next_editable_section_id())
+    section = content_loader.get_first_editable_section(framework_slug, 'edit_brief', lot['slug'])
 
     return render_template(
         "buyers/create_brief_question.html",
@@ -41,11 +37,7 @@ def create_new_brief(framework_slug, lot_slug):
     framework, lot = get_framework_and_lot(framework_slug, lot_slug, data_api_client,
                                            allowed_statuses=['live'], must_allow_brief=True)
 
-    content = content_loader.get_manifest(framework_slug, 'edit_brief').filter(
-        {'lot': lot['slug']}
-    )
-
-    section = content.get_section(content.get_next_editable_section_id())
+    section = content_loader.get_first_editable_section(framework_slug, 'edit_brief', lot['slug'])
 
     update_data = section.get_data(request.form)
 
@@ -92,10 +84,7 @@ def copy_brief(framework_slug, lot_slug, brief_id):
     new_brief = data_api_client.copy_brief(brief_id, current_user.email_address)['briefs']
 
     # Get first question for 'edit_brief'
-    content = content_loader.get_manifest(framework_slug, 'edit_brief').filter(
-        {'lot': lot_slug}
-    )
-    section = content.get_section(content.get_next_editable_section_id())
+    section = content_loader.get_first_editable_section(framework_slug, 'edit_brief', lot_slug)
 
     # Redirect to first question with new (copy of) brief
     return redirect(url_for(
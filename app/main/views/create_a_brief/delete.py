@@ -21,7 +21,8 @@ def delete_a_brief_warning(framework_slug, lot_slug, brief_id):
         lot_slug,
         data_api_client,
         allowed_statuses=['live', 'expired'],
-        must_allow_brief=True
+        must_allow_brief=True,
+        brief_id=brief_id,
     )
     brief = data_api_client.get_brief(brief_id)["briefs"]
 
@@ -42,7 +43,8 @@ def delete_a_brief(framework_slug, lot_slug, brief_id):
         lot_slug,
         data_api_client,
         allowed_statuses=['live', 'expired'],
-        must_allow_brief=True
+        must_allow_brief=True,
+        brief_id=brief_id,
     )
     brief = data_api_client.get_brief(brief_id)["briefs"]
 
@@ -10,8 +10,9 @@ from app import data_api_client
 from ... import main, content_loader
 from ...helpers.buyers_helpers import (
     brief_can_be_edited,
-    count_unanswered_questions,
+    get_brief_completeness,
     get_framework_and_lot,
+    get_manifest_index,
     is_brief_correct,
 )
 
@@ -20,7 +21,9 @@ from ...helpers.buyers_helpers import (
     '/frameworks/<framework_slug>/requirements/<lot_slug>/<brief_id>/edit/<section_slug>/<question_id>',
     methods=['GET'])
 def edit_brief_question(framework_slug, lot_slug, brief_id, section_slug, question_id):
-    get_framework_and_lot(framework_slug, lot_slug, data_api_client, allowed_statuses=['live'], must_allow_brief=True)
+    get_framework_and_lot(
+        framework_slug, lot_slug, data_api_client, allowed_statuses=['live'], must_allow_brief=True, brief_id=brief_id,
+    )
     brief = data_api_client.get_brief(brief_id)["briefs"]
 
     if not is_brief_correct(brief, framework_slug, lot_slug, current_user.id) or not brief_can_be_edited(brief):
@@ -29,11 +32,12 @@ def edit_brief_question(framework_slug, lot_slug, brief_id, section_slug, questi
     content = content_loader.get_manifest(brief['frameworkSlug'], 'edit_brief').filter(
         {'lot': brief['lotSlug']}
     )
-    section = content.get_section(section_slug)
+    content_index = get_manifest_index(content)
+    section = content_index.get_section(section_slug)
     if section is None or not section.editable:
         abort(404)
 
-    question = section.get_question(question_id)
+    question = content_index.get_question(question_id, section_slug=section.slug)
     if not question:
         abort(404)
 
@@ -49,18 +53,21 @@ def edit_brief_question(framework_slug, lot_slug, brief_id, section_slug, questi
     '/frameworks/<framework_slug>/requirements/<lot_slug>/<brief_id>/edit/<section_id>/<question_id>',
     methods=['POST'])
 def update_brief_submission(framework_slug, lot_slug, brief_id, section_id, question_id):
-    get_framework_and_lot(framework_slug, lot_slug, data_api_client, allowed_statuses=['live'], must_allow_brief=True)
+    get_framework_and_lot(
+        framework_slug, lot_slug, data_api_client, allowed_statuses=['live'], must_allow_brief=True, brief_id=brief_id,
+    )
     brief = data_api_client.get_brief(brief_id)["briefs"]
 
     if not is_brief_correct(brief, framework_slug, lot_slug, current_user.id) or not brief_can_be_edited(brief):
         abort(404)
 
     content = content_loader.get_manifest(brief['frameworkSlug'], 'edit_brief').filter({'lot': brief['lotSlug']})
-    section = content.get_section(section_id)
+    content_index = get_manifest_index(content)
+    section = content_index.get_section(section_id)
     if section is None or not section.editable:
         abort(404)
 
-    question = section.get_question(question_id)
+    question = content_index.get_question(question_id, section_slug=section.slug)
     if not question:
         abort(404)
 
@@ -115,7 +122,8 @@ def view_brief_section_summary(framework_slug, lot_slug, brief_id, section_slug)
         lot_slug,
         data_api_client,
         allowed_statuses=['live', 'expired'],
-        must_allow_brief=True
+        must_allow_brief=True,
+        brief_id=brief_id,
     )
     brief = data_api_client.get_brief(brief_id)["briefs"]
 
@@ -129,6 +137,8 @@ def view_brief_section_summary(framework_slug, lot_slug, brief_id, section_slug)
     if not section:
         abort(404)
 
+    # summaries can be shared with other requests, so annotate our own copy of the section
+    section = section.copy()
     section.summary_list = []
     for question in section.questions:
         section.summary_list.append(
@@ -146,8 +156,7 @@ def view_brief_section_summary(framework_slug, lot_slug, brief_id, section_slug)
         )
 
     # Show preview link if all mandatory questions have been answered
-    unanswered_required, unanswered_optional = count_unanswered_questions(sections)
-    show_dos_preview_link = (unanswered_required == 0)
+    show_dos_preview_link = get_brief_completeness(sections).previewable
 
     return render_template(
         "buyers/section_summary.html",
@@ -9,8 +9,9 @@ from app import data_api_client
 from ... import main, content_loader
 from ...helpers.buyers_helpers import (
     brief_can_be_edited,
-    count_unanswered_questions,
+    get_brief_completeness,
     get_framework_and_lot,
+    get_manifest_index,
     is_brief_correct,
 )
 
@@ -18,7 +19,9 @@ from ...helpers.buyers_helpers import (
 @main.route('/frameworks/<framework_slug>/requirements/<lot_slug>/<brief_id>/preview', methods=['GET'])
 def preview_brief(framework_slug, lot_slug, brief_id):
     # Displays draft content in tabs for the user to see what their published brief will look like
-    get_framework_and_lot(framework_slug, lot_slug, data_api_client, allowed_statuses=['live'], must_allow_brief=True)
+    get_framework_and_lot(
+        framework_slug, lot_slug, data_api_client, allowed_statuses=['live'], must_allow_brief=True, brief_id=brief_id,
+    )
     brief = data_api_client.get_brief(brief_id)["briefs"]
 
     if not is_brief_correct(brief, framework_slug, lot_slug, current_user.id) or not brief_can_be_edited(brief):
@@ -27,7 +30,7 @@ def preview_brief(framework_slug, lot_slug, brief_id):
     content = content_loader.get_manifest(brief['frameworkSlug'], 'edit_brief').filter({'lot': brief['lotSlug']})
 
     # Check that all questions have been answered
-    unanswered_required, unanswered_optional = count_unanswered_questions(content.summary(brief))
+    unanswered_required = get_brief_completeness(content.summary(brief)).unanswered_required
     if unanswered_required > 0:
         return render_template(
             "buyers/preview_brief.html",
@@ -47,7 +50,9 @@ def preview_brief(framework_slug, lot_slug, brief_id):
 @main.route('/frameworks/<framework_slug>/requirements/<lot_slug>/<brief_id>/preview-source', methods=['GET'])
 def preview_brief_source(framework_slug, lot_slug, brief_id):
     # This view's response currently is what will populate the iframes in the view above
-    get_framework_and_lot(framework_slug, lot_slug, data_api_client, allowed_statuses=['live'], must_allow_brief=True)
+    get_framework_and_lot(
+        framework_slug, lot_slug, data_api_client, allowed_statuses=['live'], must_allow_brief=True, brief_id=brief_id,
+    )
     brief = data_api_client.get_brief(brief_id)["briefs"]
 
     if not is_brief_correct(brief, framework_slug, lot_slug, current_user.id) or not brief_can_be_edited(brief):
@@ -57,7 +62,7 @@ def preview_brief_source(framework_slug, lot_slug, brief_id):
     editable_content = content_loader.get_manifest(brief['frameworkSlug'], 'edit_brief').filter(
         {'lot': brief['lotSlug']}
     )
-    unanswered_required, unanswered_optional = count_unanswered_questions(editable_content.summary(brief))
+    unanswered_required = get_brief_completeness(editable_content.summary(brief)).unanswered_required
     if unanswered_required > 0:
         abort(400, 'There are still unanswered required questions')
 
@@ -94,7 +99,9 @@ def preview_brief_source(framework_slug, lot_slug, brief_id):
 
 @main.route('/frameworks/<framework_slug>/requirements/<lot_slug>/<brief_id>/publish', methods=['GET', 'POST'])
 def publish_brief(framework_slug, lot_slug, brief_id):
-    get_framework_and_lot(framework_slug, lot_slug, data_api_client, allowed_statuses=['live'], must_allow_brief=True)
+    get_framework_and_lot(
+        framework_slug, lot_slug, data_api_client, allowed_statuses=['live'], must_allow_brief=True, brief_id=brief_id,
+    )
     brief = data_api_client.get_brief(brief_id)["briefs"]
 
     if not is_brief_correct(brief, framework_slug, lot_slug, current_user.id) or not brief_can_be_edited(brief):
@@ -105,16 +112,15 @@ def publish_brief(framework_slug, lot_slug, brief_id):
     brief_user_name = brief_users['name']
 
     sections = content.summary(brief)
+    sections_index = get_manifest_index(sections)
     question_and_answers = {}
-    question_and_answers_content = sections.get_question('questionAndAnswerSessionDetails')
+    question_and_answers_content = sections_index.get_question('questionAndAnswerSessionDetails')
     question_and_answers['id'] = question_and_answers_content['id']
 
     # Annotate the section data with the section slug/id, to construct the Edit link in the template
-    for section in sections:
-        if section.get_question('questionAndAnswerSessionDetails') == question_and_answers_content:
-            question_and_answers['slug'] = section['id']
+    question_and_answers['slug'] = sections_index.get_question_section('questionAndAnswerSessionDetails').slug
 
-    unanswered_required, unanswered_optional = count_unanswered_questions(sections)
+    unanswered_required = get_brief_completeness(sections).unanswered_required
 
     if request.method == 'POST':
         if unanswered_required > 0:
@@ -127,10 +133,8 @@ def publish_brief(framework_slug, lot_slug, brief_id):
     else:
         #  requirements length is a required question but is handled separately to other
         #  required questions on the publish page if it's unanswered.
-        if (
-            sections.get_section('set-how-long-your-requirements-will-be-open-for') and
-            sections.get_section('set-how-long-your-requirements-will-be-open-for').questions[0].answer_required
-        ):
+        requirements_length_section = sections_index.get_section('set-how-long-your-requirements-will-be-open-for')
+        if requirements_length_section and requirements_length_section.questions[0].answer_required:
             unanswered_required -= 1
 
         email_address = brief_users['emailAddress']
@@ -154,7 +158,8 @@ def view_brief_timeline(framework_slug, lot_slug, brief_id):
         lot_slug,
         data_api_client,
         allowed_statuses=['live', 'expired'],
-        must_allow_brief=True
+        must_allow_brief=True,
+        brief_id=brief_id,
     )
     brief = data_api_client.get_brief(brief_id)["briefs"]
     if not is_brief_correct(brief, framework_slug, lot_slug, current_user.id) or brief.get('status') != 'live':
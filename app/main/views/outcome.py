@@ -29,6 +29,7 @@ def award_or_cancel_brief(framework_slug, lot_slug, brief_id):
         data_api_client,
         allowed_statuses=['live', 'expired'],
         must_allow_brief=True,
+        brief_id=brief_id,
     )
     brief = data_api_client.get_brief(brief_id)["briefs"]
 
@@ -77,6 +78,7 @@ def award_brief(framework_slug, lot_slug, brief_id):
         data_api_client,
         allowed_statuses=['live', 'expired'],
         must_allow_brief=True,
+        brief_id=brief_id,
     )
     brief = data_api_client.get_brief(brief_id)["briefs"]
 
@@ -150,6 +152,7 @@ def cancel_brief(framework_slug, lot_slug, brief_id):
         data_api_client,
         allowed_statuses=['live', 'expired'],
         must_allow_brief=True,
+        brief_id=brief_id,
     )
     brief = data_api_client.get_brief(brief_id)["briefs"]
     if not is_brief_correct(brief, framework_slug, lot_slug, current_user.id, allowed_statuses=['closed']):
@@ -221,6 +224,7 @@ def award_brief_details(framework_slug, lot_slug, brief_id, brief_response_id):
         data_api_client,
         allowed_statuses=['live', 'expired'],
         must_allow_brief=True,
+        brief_id=brief_id,
     )
     brief = data_api_client.get_brief(brief_id)["briefs"]
     if not is_brief_correct(brief, framework_slug, lot_slug, current_user.id):
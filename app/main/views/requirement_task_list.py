@@ -3,10 +3,10 @@ from flask_login import current_user
 
 from dmutils.flask import timed_render_template as render_template
 
-from app import data_api_client
+from app import api_executor, data_api_client
 from .. import main, content_loader
 from ..helpers.buyers_helpers import (
-    count_unanswered_questions,
+    get_brief_completeness,
     get_framework_and_lot,
     is_brief_correct,
 )
@@ -14,6 +14,8 @@ from ..helpers.buyers_helpers import (
 
 @main.route('/frameworks/<framework_slug>/requirements/<lot_slug>/<brief_id>', methods=['GET'])
 def view_brief_overview(framework_slug, lot_slug, brief_id):
+    # the brief is fetched while we get the framework
+    brief = api_executor.submit(data_api_client.get_brief, brief_id)
     framework, lot = get_framework_and_lot(
         framework_slug,
         lot_slug,
@@ -21,7 +23,7 @@ def view_brief_overview(framework_slug, lot_slug, brief_id):
         allowed_statuses=['live', 'expired'],
         must_allow_brief=True
     )
-    brief = data_api_client.get_brief(brief_id)["briefs"]
+    brief = brief.result()["briefs"]
 
     if not is_brief_correct(brief, framework_slug, lot_slug, current_user.id):
         abort(404)
@@ -34,30 +36,10 @@ def view_brief_overview(framework_slug, lot_slug, brief_id):
     content = content_loader.get_manifest(brief['frameworkSlug'], 'edit_brief').filter({'lot': brief['lotSlug']})
     sections = content.summary(brief)
 
-    content_loader.load_messages(brief['frameworkSlug'], ['urls'])
     call_off_contract_url = content_loader.get_message(brief['frameworkSlug'], 'urls', 'call_off_contract_url')
     framework_agreement_url = content_loader.get_message(brief['frameworkSlug'], 'urls', 'framework_agreement_url')
 
-    sections_status = {
-        'previewable': True,
-        'publishable': True
-    }
-    for section in sections:
-        required, optional = count_unanswered_questions([section])
-        if section.is_empty:
-            if required > 0:
-                sections_status[section.slug] = 'to_do'
-                sections_status['previewable'] = False
-                sections_status['publishable'] = False
-            elif optional > 0:
-                sections_status[section.slug] = 'optional'
-        elif not section.is_empty:
-            if required > 0:
-                sections_status[section.slug] = 'in_progress'
-                sections_status['previewable'] = False
-                sections_status['publishable'] = False
-            else:
-                sections_status[section.slug] = 'done'
+    sections_status = get_brief_completeness(sections).sections_status
 
     brief['clarificationQuestions'] = [
         dict(question, number=index + 1)
@@ -112,11 +94,13 @@ def view_brief_overview(framework_slug, lot_slug, brief_id):
         }
     ]
 
+    # answers are shown from the summary `sections`; the page only uses the brief's own details (its title, status,
+    # dates...), which are the same unformatted, so the brief isn't unpacked for a form as it is on edit pages
     return render_template(
         "buyers/brief_overview.html",
         framework=framework,
         confirm_remove=request.args.get("confirm_remove", None),
-        brief=section.unformat_data(brief),
+        brief=brief,
         sections=sections,
         sections_status=sections_status,
         step_sections=[section.step for section in sections if hasattr(section, 'step')],
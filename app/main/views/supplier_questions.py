@@ -23,7 +23,8 @@ def supplier_questions(framework_slug, lot_slug, brief_id):
         lot_slug,
         data_api_client,
         allowed_statuses=['live', 'expired'],
-        must_allow_brief=True
+        must_allow_brief=True,
+        brief_id=brief_id,
     )
     brief = data_api_client.get_brief(brief_id)["briefs"]
 
@@ -52,7 +53,8 @@ def add_supplier_question(framework_slug, lot_slug, brief_id):
         framework_slug,
         lot_slug, data_api_client,
         allowed_statuses=['live', 'expired'],
-        must_allow_brief=True
+        must_allow_brief=True,
+        brief_id=brief_id,
     )
     brief = data_api_client.get_brief(brief_id)["briefs"]
 
@@ -1,5 +1,6 @@
 from flask import Blueprint
 from dmutils.metrics import DMGDSMetrics
+from prometheus_client import Counter, Histogram
 
 
 metrics = Blueprint('metrics', __name__)
@@ -7,3 +8,63 @@ metrics = Blueprint('metrics', __name__)
 gds_metrics = DMGDSMetrics()
 
 metrics.add_url_rule(gds_metrics.metrics_path, 'metrics', gds_metrics.metrics_endpoint)
+
+data_api_read_cache = Counter(
+    'data_api_read_cache_total',
+    'Data API reads by whether they were answered from the request cache (hit), by waiting for the same read '
+    'already being made (shared) or by calling the API (miss)',
+    ['result'],
+)
+
+data_api_connection_pool_checkouts = Counter(
+    'data_api_connection_pool_checkouts_total',
+    'Connections taken from the data API connection pool',
+)
+data_api_connection_pool_waits = Counter(
+    'data_api_connection_pool_waits_total',
+    'Connections asked of the data API connection pool when every connection it allows was in use',
+)
+data_api_connection_pool_new_connections = Counter(
+    'data_api_connection_pool_new_connections_total',
+    'New connections opened to the data API',
+)
+
+data_api_circuit_breaker_trips = Counter(
+    'data_api_circuit_breaker_trips_total',
+    'Times the circuit breaker for a data API endpoint opened after repeated failures',
+    ['endpoint'],
+)
+data_api_circuit_breaker_rejections = Counter(
+    'data_api_circuit_breaker_rejections_total',
+    'Data API calls not made because the circuit breaker for their endpoint was open',
+    ['endpoint'],
+)
+data_api_hedged_reads = Counter(
+    'data_api_hedged_reads_total',
+    'Slow data API reads that were made a second time, by which attempt answered first',
+    ['endpoint', 'winner'],
+)
+
+data_api_response_size_bytes = Histogram(
+    'data_api_response_size_bytes',
+    'Size of the JSON bodies of data API responses',
+    ['endpoint'],
+    buckets=(1e3, 1e4, 1e5, 1e6, 1e7, float('inf')),
+)
+data_api_response_wire_bytes = Counter(
+    'data_api_response_wire_bytes_total',
+    'Bytes of JSON data API responses received over the wire, by content encoding',
+    ['endpoint', 'encoding'],
+)
+data_api_response_decode_seconds = Histogram(
+    'data_api_response_decode_seconds',
+    'Time taken to decode the JSON bodies of data API responses',
+    ['endpoint'],
+    buckets=(.0001, .001, .01, .05, .1, .5, 1, float('inf')),
+)
+
+data_api_batches = Counter(
+    'data_api_batches_total',
+    'Batch requests for data API reads, by whether they were made or failed (the reads then being made one by one)',
+    ['result'],
+)
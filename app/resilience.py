@@ -0,0 +1,213 @@
+import math
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+from dmapiclient import APIError
+from .concurrency import RequestState, call_with_request_state, get_request_state
+from .metrics import (
+    data_api_circuit_breaker_rejections,
+    data_api_circuit_breaker_trips,
+    data_api_hedged_reads,
+)
+
+
+class CircuitOpenError(APIError):
+    """Raised instead of calling an API endpoint that's been failing. It has no response, so it's a 503."""
+
+    def __init__(self, endpoint):
+        super().__init__(message="Not calling {} while its circuit breaker is open".format(endpoint))
+        self.endpoint = endpoint
+
+
+class CircuitBreaker(object):
+    """Stops calls to something that keeps failing, so that callers fail fast rather than wait to fail.
+
+    After `failure_threshold` failures in a row the breaker opens and ``allow_request`` refuses every call. Once
+    `reset_timeout` seconds have passed a single trial call is allowed (half-open): if it succeeds the breaker
+    closes again, otherwise it stays open for another `reset_timeout`.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold, reset_timeout, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == self.OPEN and self._clock() >= self._opened_at + self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return self.state == self.CLOSED
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        """Count a failed call, returning True if it opened the breaker"""
+        with self._lock:
+            if self.state == self.OPEN:
+                # a call made before the breaker opened
+                return False
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = self._clock()
+                return True
+            return False
+
+
+class LatencyWindow(object):
+    """The durations of the last `size` calls to something"""
+
+    def __init__(self, size=100):
+        self._durations = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, duration):
+        with self._lock:
+            self._durations.append(duration)
+
+    def percentile(self, percent, min_samples=1):
+        """Return the `percent`th percentile duration, or None if fewer than `min_samples` calls have been timed"""
+        with self._lock:
+            durations = sorted(self._durations)
+        if not durations or len(durations) < min_samples:
+            return None
+        return durations[max(math.ceil(len(durations) * percent / 100) - 1, 0)]
+
+
+class APIResilience(object):
+    """Protects the app from a slow or failing data API.
+
+    Each endpoint (a method and path, with ids left out) has its own ``CircuitBreaker``, so calls to an endpoint
+    that's failing with 5xx responses (or timing out) raise ``CircuitOpenError`` straight away, which
+    ``api_error_handler`` renders like any other API error, instead of holding a thread for the length of a timeout.
+    Client errors (4xx) don't count as failures. ``DM_DATA_API_CIRCUIT_BREAKER_FAILURES`` of 0 turns this off.
+
+    If ``DM_DATA_API_HEDGE_PERCENTILE`` is set, a GET that takes longer than that percentile of its endpoint's recent
+    successful calls is made a second time (hedged) and whichever response arrives first is used. Both attempts run
+    in a pool of ``DM_DATA_API_HEDGE_THREADS`` threads of their own, and are passed nothing of the request they're for
+    but its tracing headers, so a hedged call must be a plain function making an idempotent read.
+    """
+
+    ENDPOINT_ID_PATTERN = re.compile(r'/\d+(?=/|$)')
+
+    def __init__(self, app=None):
+        self.failure_threshold = 0
+        self.reset_timeout = 0
+        self.hedge_percentile = None
+        self.hedge_min_samples = 0
+        self._breakers = {}
+        self._latencies = {}
+        self._lock = threading.Lock()
+        self._hedge_executor = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.failure_threshold = app.config['DM_DATA_API_CIRCUIT_BREAKER_FAILURES']
+        self.reset_timeout = app.config['DM_DATA_API_CIRCUIT_BREAKER_RESET_TIMEOUT']
+        self.hedge_percentile = app.config['DM_DATA_API_HEDGE_PERCENTILE']
+        self.hedge_min_samples = app.config['DM_DATA_API_HEDGE_MIN_SAMPLES']
+        with self._lock:
+            self._breakers = {}
+            self._latencies = {}
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+            self._hedge_executor = None
+        if self.hedge_percentile:
+            self._hedge_executor = ThreadPoolExecutor(
+                max_workers=app.config['DM_DATA_API_HEDGE_THREADS'],
+                thread_name_prefix='data-api-hedge',
+            )
+
+    @classmethod
+    def get_endpoint(cls, method, url):
+        return '{} {}'.format(method, cls.ENDPOINT_ID_PATTERN.sub('/:id', urlsplit(url).path))
+
+    def _get_breaker(self, endpoint):
+        if not self.failure_threshold:
+            return None
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[endpoint]
+
+    def _get_latencies(self, endpoint):
+        with self._lock:
+            if endpoint not in self._latencies:
+                self._latencies[endpoint] = LatencyWindow()
+            return self._latencies[endpoint]
+
+    def call(self, method, url, make_request):
+        """Return the result of `make_request` (which makes a `method` request to `url`) unless its circuit is open"""
+        endpoint = self.get_endpoint(method, url)
+        breaker = self._get_breaker(endpoint)
+        if breaker is not None and not breaker.allow_request():
+            data_api_circuit_breaker_rejections.labels(endpoint=endpoint).inc()
+            raise CircuitOpenError(endpoint)
+
+        start_time = time.perf_counter()
+        try:
+            if method == 'GET' and self._hedge_executor is not None:
+                response = self._make_hedged_request(endpoint, make_request)
+            else:
+                response = make_request()
+        except Exception as e:
+            if breaker is not None:
+                if isinstance(e, APIError) and e.status_code >= 500:
+                    if breaker.record_failure():
+                        data_api_circuit_breaker_trips.labels(endpoint=endpoint).inc()
+                else:
+                    breaker.record_success()
+            raise
+
+        if breaker is not None:
+            breaker.record_success()
+        self._get_latencies(endpoint).add(time.perf_counter() - start_time)
+        return response
+
+    def _make_hedged_request(self, endpoint, make_request):
+        hedge_after = self._get_latencies(endpoint).percentile(self.hedge_percentile, self.hedge_min_samples)
+        if hedge_after is None:
+            return make_request()
+
+        # the attempts only get the request's tracing headers, passed to them explicitly
+        request_state = get_request_state()
+        if request_state is not None:
+            request_state = RequestState({}, request_state.onwards_request_headers)
+
+        def submit():
+            return self._hedge_executor.submit(call_with_request_state, request_state, make_request)
+
+        primary = submit()
+        done, _ = wait([primary], timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        hedge = submit()
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            # an attempt that failed only matters if the other one fails too
+            succeeded = [future for future in done if future.exception() is None]
+            if succeeded or not pending:
+                winner = (succeeded or [primary])[0]
+                data_api_hedged_reads.labels(
+                    endpoint=endpoint, winner='primary' if winner is primary else 'hedge',
+                ).inc()
+                return winner.result()
@@ -0,0 +1,199 @@
+import json
+import logging
+import queue
+import re
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import parse_qs, urlsplit
+
+import redis
+
+
+logger = logging.getLogger(__name__)
+
+
+class LocalRedis(object):
+    """An in-process stand-in for the few Redis commands the app uses, for tests and running without Redis"""
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._data = {}
+        self._pubsubs = []
+        self._lock = threading.Lock()
+
+    def _get(self, name):
+        value, expires_at = self._data.get(name, (None, None))
+        if expires_at is not None and self._clock() >= expires_at:
+            del self._data[name]
+            return None
+        return value
+
+    def get(self, name):
+        with self._lock:
+            return self._get(name)
+
+    def set(self, name, value, ex=None):
+        with self._lock:
+            self._data[name] = (value, self._clock() + ex if ex else None)
+        return True
+
+    def delete(self, *names):
+        with self._lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+
+    def expire(self, name, time):
+        with self._lock:
+            value = self._get(name)
+            if value is None:
+                return False
+            self._data[name] = (value, self._clock() + time)
+            return True
+
+    def sadd(self, name, *values):
+        with self._lock:
+            members = self._get(name)
+            if members is None:
+                members = set()
+                self._data[name] = (members, None)
+            added = len(set(values) - members)
+            members.update(values)
+            return added
+
+    def smembers(self, name):
+        with self._lock:
+            return set(self._get(name) or ())
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = [pubsub for pubsub in self._pubsubs if channel in pubsub.channels]
+        for pubsub in subscribers:
+            pubsub.messages.put({'type': 'message', 'channel': channel, 'data': message})
+        return len(subscribers)
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        pubsub = _LocalPubSub(self)
+        with self._lock:
+            self._pubsubs.append(pubsub)
+        return pubsub
+
+
+class _LocalPubSub(object):
+    def __init__(self, local_redis):
+        self._local_redis = local_redis
+        self.channels = set()
+        self.messages = queue.Queue()
+
+    def subscribe(self, *channels):
+        self.channels.update(channels)
+
+    def get_message(self, timeout=0):
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        with self._local_redis._lock:
+            self._local_redis._pubsubs.remove(self)
+
+
+CacheRule = namedtuple('CacheRule', ['name', 'path_pattern', 'should_cache', 'get_tags'])
+
+
+# Only what no write made anywhere (through this app, the other frontends or the API itself) can leave stale for
+# longer than its TTL belongs here, since nothing but the TTL forgets it on other nodes. Briefs and their responses
+# don't qualify: even closed ones are withdrawn, awarded and get late responses through the admin and supplier apps.
+DATA_API_CACHE_RULES = [
+    CacheRule(
+        'frameworks',
+        re.compile(r'^/frameworks/(?P<framework_slug>[^/]+)$'),
+        lambda cache, match, query, response: True,
+        lambda match, query: ['framework:{}'.format(match.group('framework_slug'))],
+    ),
+]
+
+
+class APIResponseCache(object):
+    """A read-through cache of selected data API responses, shared by every node through Redis.
+
+    Only responses matching one of the cache rules (and that rule's ``should_cache`` check) are cached, each for the
+    number of seconds given for its rule in ``DM_API_RESPONSE_CACHE_TTLS`` (a rule with no TTL isn't used). Each
+    entry is tagged (e.g. with the framework it's for) so that everything cached about something can be forgotten at
+    once with ``invalidate_tags``.
+
+    The Redis connection is the one set up for sessions. Where there isn't one (in tests, or when running locally
+    without Redis) an in-process ``LocalRedis`` is used instead. Redis being unavailable is never fatal: reads go
+    straight to the API instead.
+    """
+
+    KEY_PREFIX = 'briefs-frontend:data-api:'
+    TAG_PREFIX = 'briefs-frontend:data-api-tag:'
+
+    def __init__(self, rules=DATA_API_CACHE_RULES):
+        self.rules = rules
+        self.redis = None
+        self.ttls = {}
+
+    def init_app(self, app):
+        self.redis = app.config.get('SESSION_REDIS') or LocalRedis()
+        self.ttls = app.config['DM_API_RESPONSE_CACHE_TTLS']
+
+    def _get_rule(self, path):
+        for rule in self.rules:
+            if self.ttls.get(rule.name):
+                match = rule.path_pattern.match(path)
+                if match:
+                    return rule, match
+        return None, None
+
+    def get(self, url):
+        """Return the cached response for `url` (a path, with any query string) or None if there isn't one"""
+        if self.redis is None:
+            return None
+        try:
+            value = self.redis.get(self.KEY_PREFIX + url)
+        except redis.RedisError as e:
+            logger.warning("Failed to read cached data API response for %s: %s", url, e)
+            return None
+        return json.loads(value) if value is not None else None
+
+    def get_or_fetch(self, url, fetch_response):
+        """Return the cached response for `url`, calling `fetch_response` for it (and caching it if allowed) if need be
+        """
+        split_url = urlsplit(url)
+        rule, match = self._get_rule(split_url.path)
+        if rule is None or self.redis is None:
+            return fetch_response()
+
+        response = self.get(url)
+        if response is not None:
+            return response
+
+        response = fetch_response()
+        query = parse_qs(split_url.query)
+        if response is not None and rule.should_cache(self, match, query, response):
+            self._set(url, response, self.ttls[rule.name], rule.get_tags(match, query))
+        return response
+
+    def _set(self, url, response, ttl, tags):
+        key = self.KEY_PREFIX + url
+        try:
+            for tag in tags:
+                # a tag has to outlive every response tagged with it
+                self.redis.sadd(self.TAG_PREFIX + tag, key)
+                self.redis.expire(self.TAG_PREFIX + tag, max(self.ttls.values()))
+            self.redis.set(key, json.dumps(response), ex=ttl)
+        except redis.RedisError as e:
+            logger.warning("Failed to cache data API response for %s: %s", url, e)
+
+    def invalidate_tags(self, *tags):
+        """Forget every cached response tagged with any of `tags`"""
+        if self.redis is None:
+            return
+        try:
+            for tag in tags:
+                keys = self.redis.smembers(self.TAG_PREFIX + tag)
+                self.redis.delete(self.TAG_PREFIX + tag, *keys)
+        except redis.RedisError as e:
+            logger.warning("Failed to invalidate cached data API responses for %s: %s", tags, e)
@@ -40,6 +40,58 @@ class Config(object):
     DM_NOTIFY_API_KEY = None
     DM_REDIS_SERVICE_NAME = None
 
+    # seconds to wait for a connection to, and then a response from, the data API
+    DM_DATA_API_CONNECT_TIMEOUT = 15
+    DM_DATA_API_READ_TIMEOUT = 45
+    # connections to the data API kept open for reuse, whether to wait for one rather than open more, and for how many
+    # seconds to wait before giving up (None to wait forever)
+    DM_DATA_API_POOL_MAXSIZE = 20
+    DM_DATA_API_POOL_BLOCK = True
+    DM_DATA_API_POOL_TIMEOUT = 5
+    # path of the data API endpoint for making several reads at once, or None if it hasn't one. Views that need a
+    # brief along with its (uncached) framework fetch both in one round trip once this is set
+    DM_DATA_API_BATCH_PATH = None
+    # whether the data API can leave the fields a view didn't ask for out of the briefs and brief responses it lists.
+    # The current API ignores the `fields` parameter, so this stays off (and views get every field) until it doesn't
+    DM_DATA_API_SUPPORTS_PROJECTION = False
+    # whether to ask the data API for gzipped responses
+    DM_DATA_API_COMPRESSION = True
+    # how data API responses are decoded (see app/json_codec.py), or None for the fastest one installed
+    DM_DATA_API_JSON_CODEC = None
+    # failures in a row after which calls to a data API endpoint fail straight away (0 to never), and for how many
+    # seconds before it's tried again
+    DM_DATA_API_CIRCUIT_BREAKER_FAILURES = 5
+    DM_DATA_API_CIRCUIT_BREAKER_RESET_TIMEOUT = 30
+    # reads slower than this percentile of their endpoint's recent reads are made again (None to never), once at
+    # least DM_DATA_API_HEDGE_MIN_SAMPLES reads have been timed, using a pool of DM_DATA_API_HEDGE_THREADS threads
+    DM_DATA_API_HEDGE_PERCENTILE = None
+    DM_DATA_API_HEDGE_MIN_SAMPLES = 20
+    DM_DATA_API_HEDGE_THREADS = 10
+    # seconds each kind of data API response is kept in the cache shared by every node (see app/response_cache.py)
+    DM_API_RESPONSE_CACHE_TTLS = {
+        'frameworks': 300,
+    }
+
+    # manifests for these frameworks are parsed when the app starts, others only when first needed
+    DM_PRELOAD_CONTENT_FRAMEWORKS = [
+        'digital-outcomes-and-specialists-4',
+        'digital-outcomes-and-specialists-5',
+    ]
+
+    # threads per app for making data API calls concurrently
+    DM_API_EXECUTOR_THREADS = 10
+
+    # seconds a framework fetched from the API is used for, and how long after that it can still be used while it's
+    # being fetched again in the background
+    DM_FRAMEWORK_CACHE_TTL = 300
+    DM_FRAMEWORK_CACHE_STALE_TTL = 3600
+    # seconds the counts on a buyer's account home page are kept for (changes to their briefs forget them sooner),
+    # and the most buyers they're kept for at once
+    DM_DASHBOARD_TOTALS_CACHE_TTL = 60
+    DM_DASHBOARD_TOTALS_CACHE_SIZE = 10000
+    # lists of a buyer's briefs kept, to be used again for as long as none of their briefs change
+    DM_BRIEF_LIST_CACHE_SIZE = 1024
+
     NOTIFY_TEMPLATES = {
         "create_user_account": "84f5d812-df9d-4ab8-804a-06f64f5abd30",
     }
@@ -97,6 +149,11 @@ class Test(Config):
     DM_DATA_API_URL = "http://wrong.completely.invalid:5000"
     DM_DATA_API_AUTH_TOKEN = "myToken"
 
+    # tests change what the API returns for a framework from one request to the next
+    DM_FRAMEWORK_CACHE_TTL = 0
+    DM_DASHBOARD_TOTALS_CACHE_TTL = 0
+    DM_BRIEF_LIST_CACHE_SIZE = 0
+
     DM_NOTIFY_API_KEY = "not_a_real_key-00000000-fake-uuid-0000-000000000000"
     SHARED_EMAIL_KEY = "KEY"
     SECRET_KEY = "KEY"
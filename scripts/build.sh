@@ -3,6 +3,7 @@
 set -e
 
 npm run frontend-build:production 1>&2
+python scripts/build_content_snapshot.py 1>&2
 
 # Non-Git paths that should be included when deploying
 echo "app/static"
@@ -0,0 +1,18 @@
+#!/usr/bin/env python
+"""Write a snapshot of the manifests and messages used by the app, so workers can skip parsing YAML at startup.
+
+The snapshot is checked against a hash of the content when it's loaded, and is ignored if it's out of date.
+
+Usage:
+    scripts/build_content_snapshot.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.main import CONTENT_SNAPSHOT_PATH, content_loader  # noqa
+
+
+if __name__ == '__main__':
+    content_loader.write_snapshot(CONTENT_SNAPSHOT_PATH)
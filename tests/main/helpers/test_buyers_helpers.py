@@ -1,9 +1,13 @@
 import mock
 import pytest
+from flask import Flask
 from werkzeug.exceptions import NotFound
 
 import app.main.helpers as helpers
-from dmcontent.content_loader import ContentLoader
+from app.api_client import CachingDataAPIClient
+from app.caching import LRUCache, TTLCache
+from app.concurrency import APIExecutor
+from dmcontent.content_loader import ContentLoader, ContentManifest
 
 from dmtestutils.api_model_stubs import BriefStub, FrameworkStub, LotStub
 
@@ -68,6 +72,237 @@ class TestBuyersHelpers(object):
                 must_allow_brief=True,
             )
 
+    def test_get_framework_and_lot_uses_cached_framework(self):
+        data_api_client = mock.Mock()
+        data_api_client.get_framework.return_value = FrameworkStub(
+            slug='digital-outcomes-and-specialists-4',
+            status='live',
+            lots=[LotStub(slug='digital-specialists', allows_brief=True).response()],
+        ).single_result_response()
+
+        with mock.patch.object(helpers.buyers_helpers, 'framework_cache', TTLCache(ttl=300)):
+            first = helpers.buyers_helpers.get_framework_and_lot(
+                'digital-outcomes-and-specialists-4', 'digital-specialists', data_api_client
+            )
+            second = helpers.buyers_helpers.get_framework_and_lot(
+                'digital-outcomes-and-specialists-4', 'digital-specialists', data_api_client
+            )
+
+            assert first == second
+            assert data_api_client.get_framework.call_count == 1
+
+            helpers.buyers_helpers.invalidate_cached_frameworks('digital-outcomes-and-specialists-4')
+            helpers.buyers_helpers.get_framework_and_lot(
+                'digital-outcomes-and-specialists-4', 'digital-specialists', data_api_client
+            )
+
+            assert data_api_client.get_framework.call_count == 2
+
+    def test_get_framework_and_lot_prefetches_brief_with_framework(self):
+        data_api_client = mock.Mock()
+        data_api_client.get_framework.return_value = FrameworkStub(
+            slug='digital-outcomes-and-specialists-4',
+            lots=[LotStub(slug='digital-specialists', allows_brief=True).response()],
+        ).single_result_response()
+
+        helpers.buyers_helpers.get_framework_and_lot(
+            'digital-outcomes-and-specialists-4', 'digital-specialists', data_api_client, brief_id=1234
+        )
+
+        prefetched_calls = data_api_client.prefetch.call_args[0]
+        data_api_client.reset_mock()
+        for call in prefetched_calls:
+            call()
+        assert data_api_client.get_framework.call_args_list == [mock.call('digital-outcomes-and-specialists-4')]
+        assert data_api_client.get_brief.call_args_list == [mock.call(1234)]
+
+    def test_get_framework_and_lot_fetches_brief_with_framework_in_one_batch(self):
+        framework = FrameworkStub(
+            slug='digital-outcomes-and-specialists-4',
+            lots=[LotStub(slug='digital-specialists', allows_brief=True).response()],
+        ).single_result_response()
+        brief = BriefStub(brief_id=1234).single_result_response()
+        data_api_client = CachingDataAPIClient('http://localhost:5000/', 'token', batch_path='/_batch')
+        app = Flask(__name__)
+
+        with mock.patch.object(data_api_client, '_call_api') as call_api:
+            call_api.return_value = {'responses': [{'status': 200, 'body': framework}, {'status': 200, 'body': brief}]}
+            with app.test_request_context('/'):
+                helpers.buyers_helpers.get_framework_and_lot(
+                    'digital-outcomes-and-specialists-4', 'digital-specialists', data_api_client, brief_id=1234
+                )
+
+                assert data_api_client.get_brief(1234) == brief
+
+        assert call_api.call_args_list == [
+            mock.call('POST', '/_batch', data={'requests': [
+                {'method': 'GET', 'url': '/frameworks/digital-outcomes-and-specialists-4'},
+                {'method': 'GET', 'url': '/briefs/1234'},
+            ]}),
+        ]
+
+    def test_get_framework_and_lot_does_not_prefetch_brief_if_framework_is_cached(self):
+        data_api_client = mock.Mock()
+        data_api_client.get_framework.return_value = FrameworkStub(
+            slug='digital-outcomes-and-specialists-4',
+            lots=[LotStub(slug='digital-specialists', allows_brief=True).response()],
+        ).single_result_response()
+
+        with mock.patch.object(helpers.buyers_helpers, 'framework_cache', TTLCache(ttl=300)):
+            for _ in range(2):
+                helpers.buyers_helpers.get_framework_and_lot(
+                    'digital-outcomes-and-specialists-4', 'digital-specialists', data_api_client, brief_id=1234
+                )
+
+        assert data_api_client.prefetch.call_count == 1
+
+    def test_get_framework_and_lot_404s_for_unknown_lot(self):
+        data_api_client = mock.Mock()
+        data_api_client.get_framework.return_value = FrameworkStub(
+            slug='digital-outcomes-and-specialists-4',
+            status='live',
+            lots=[LotStub(slug='digital-specialists', allows_brief=True).response()],
+        ).single_result_response()
+
+        with pytest.raises(NotFound):
+            helpers.buyers_helpers.get_framework_and_lot(
+                'digital-outcomes-and-specialists-4', 'digital-outcomes', data_api_client
+            )
+
+    def test_get_dashboard_totals(self):
+        data_api_client = mock.Mock()
+        data_api_client.find_briefs.return_value = {'meta': {'total': 5}}
+        data_api_client.find_direct_award_projects.side_effect = [{'meta': {'total': 0}}, {'meta': {'total': 2}}]
+
+        totals = helpers.buyers_helpers.get_dashboard_totals(123, data_api_client, APIExecutor())
+
+        assert totals == helpers.buyers_helpers.DashboardTotals(
+            briefs=5, projects_awaiting_outcomes=0, has_projects=True
+        )
+        assert data_api_client.find_direct_award_projects.call_args_list == [
+            mock.call(123, locked=True, having_outcome=False),
+            mock.call(123),
+        ]
+
+    def test_get_dashboard_totals_uses_cached_totals_until_invalidated(self):
+        data_api_client = mock.Mock()
+        data_api_client.find_briefs.return_value = {'meta': {'total': 5}}
+        data_api_client.find_direct_award_projects.return_value = {'meta': {'total': 1}}
+
+        with mock.patch.object(helpers.buyers_helpers, 'dashboard_totals_cache', TTLCache(ttl=60)):
+            helpers.buyers_helpers.get_dashboard_totals(123, data_api_client, APIExecutor())
+            helpers.buyers_helpers.get_dashboard_totals(123, data_api_client, APIExecutor())
+
+            assert data_api_client.find_briefs.call_count == 1
+
+            helpers.buyers_helpers.get_dashboard_totals(456, data_api_client, APIExecutor())
+            helpers.buyers_helpers.invalidate_dashboard_totals(123)
+            helpers.buyers_helpers.get_dashboard_totals(123, data_api_client, APIExecutor())
+            helpers.buyers_helpers.get_dashboard_totals(456, data_api_client, APIExecutor())
+
+            assert data_api_client.find_briefs.call_args_list == [
+                mock.call(123, fields=['id']), mock.call(456, fields=['id']), mock.call(123, fields=['id']),
+            ]
+
+    def _brief_list_api_client(self, briefs):
+        data_api_client = mock.Mock()
+
+        def find_briefs(user_id, status=None, fields=None):
+            return {'briefs': [
+                {field: brief[field] for field in fields or brief if field in brief}
+                for brief in briefs
+                if status is None or brief['status'] in status.split(',')
+            ]}
+
+        data_api_client.find_briefs.side_effect = find_briefs
+        return data_api_client
+
+    def test_find_user_briefs(self):
+        data_api_client = self._brief_list_api_client([
+            {'id': 1, 'status': 'draft', 'title': 'Draft', 'updatedAt': '2016-02-01T00:00:00.000000Z'},
+            {'id': 2, 'status': 'live', 'title': 'Live', 'updatedAt': '2016-02-01T00:00:00.000000Z'},
+            {'id': 3, 'status': 'closed', 'title': 'Closed', 'updatedAt': '2016-02-01T00:00:00.000000Z'},
+        ])
+
+        drafts, published = helpers.buyers_helpers.find_user_briefs(
+            123, [(['draft'], None), (['live', 'closed'], ['id', 'title'])], data_api_client, APIExecutor()
+        )
+
+        assert drafts == [
+            {'id': 1, 'status': 'draft', 'title': 'Draft', 'updatedAt': '2016-02-01T00:00:00.000000Z'},
+        ]
+        assert [brief['title'] for brief in published] == ['Live', 'Closed']
+        # without the brief list cache every brief is fetched at once
+        assert data_api_client.find_briefs.call_args_list == [mock.call(123)]
+
+    def test_find_user_briefs_fetches_each_list_with_its_fields_if_the_cache_is_on(self):
+        data_api_client = self._brief_list_api_client([
+            {'id': 1, 'status': 'draft', 'title': 'Draft', 'updatedAt': '2016-02-01T00:00:00.000000Z'},
+            {'id': 2, 'status': 'live', 'title': 'Live', 'updatedAt': '2016-02-01T00:00:00.000000Z'},
+            {'id': 3, 'status': 'closed', 'title': 'Closed', 'updatedAt': '2016-02-01T00:00:00.000000Z'},
+        ])
+
+        with mock.patch.object(helpers.buyers_helpers, 'brief_list_cache', LRUCache(10)):
+            drafts, published = helpers.buyers_helpers.find_user_briefs(
+                123, [(['draft'], None), (['live', 'closed'], ['id', 'title'])], data_api_client, APIExecutor()
+            )
+
+        assert drafts == [
+            {'id': 1, 'status': 'draft', 'title': 'Draft', 'updatedAt': '2016-02-01T00:00:00.000000Z'},
+        ]
+        assert published == [{'id': 2, 'title': 'Live'}, {'id': 3, 'title': 'Closed'}]
+
+    @pytest.mark.parametrize(['supports_projection', 'maxsize'], [(True, 10), (False, 0)])
+    def test_brief_list_cache_is_off_unless_the_api_supports_projection(self, supports_projection, maxsize):
+        app = mock.Mock(config={'DM_BRIEF_LIST_CACHE_SIZE': 10, 'DM_DATA_API_SUPPORTS_PROJECTION': supports_projection})
+
+        with mock.patch.object(helpers.buyers_helpers, 'brief_list_cache', LRUCache(0)) as brief_list_cache:
+            helpers.buyers_helpers.configure_brief_list_cache(app)
+
+            assert brief_list_cache.maxsize == maxsize
+
+    def test_find_user_briefs_only_fetches_lists_that_have_changed(self):
+        briefs = [
+            {'id': 1, 'status': 'draft', 'title': 'Draft', 'updatedAt': '2016-02-01T00:00:00.000000Z'},
+            {'id': 2, 'status': 'live', 'title': 'Live', 'updatedAt': '2016-02-01T00:00:00.000000Z'},
+        ]
+        data_api_client = self._brief_list_api_client(briefs)
+        brief_lists = [(['draft'], None), (['live'], None)]
+
+        with mock.patch.object(helpers.buyers_helpers, 'brief_list_cache', LRUCache(10)):
+            helpers.buyers_helpers.find_user_briefs(123, brief_lists, data_api_client, APIExecutor())
+            data_api_client.find_briefs.reset_mock()
+
+            helpers.buyers_helpers.find_user_briefs(123, brief_lists, data_api_client, APIExecutor())
+
+            # only the request to see whether anything has changed
+            assert data_api_client.find_briefs.call_args_list == [
+                mock.call(123, fields=helpers.buyers_helpers.BRIEF_VERSION_FIELDS),
+            ]
+
+            briefs[0].update(title='Changed draft', updatedAt='2016-02-02T00:00:00.000000Z')
+            briefs.append({'id': 3, 'status': 'live', 'title': 'Another live', 'updatedAt': '2016-02-02T00:00:00Z'})
+            data_api_client.find_briefs.reset_mock()
+
+            drafts, live = helpers.buyers_helpers.find_user_briefs(123, brief_lists, data_api_client, APIExecutor())
+
+            assert [brief['title'] for brief in drafts] == ['Changed draft']
+            assert [brief['title'] for brief in live] == ['Live', 'Another live']
+            assert data_api_client.find_briefs.call_count == 3
+
+    def test_find_user_briefs_returns_copies_of_cached_briefs(self):
+        data_api_client = self._brief_list_api_client([
+            {'id': 1, 'status': 'draft', 'title': 'Draft', 'updatedAt': '2016-02-01T00:00:00.000000Z'},
+        ])
+
+        with mock.patch.object(helpers.buyers_helpers, 'brief_list_cache', LRUCache(10)):
+            drafts, = helpers.buyers_helpers.find_user_briefs(123, [(['draft'], None)], data_api_client, APIExecutor())
+            drafts[0]['unanswered_required'] = 1
+
+            drafts, = helpers.buyers_helpers.find_user_briefs(123, [(['draft'], None)], data_api_client, APIExecutor())
+
+            assert 'unanswered_required' not in drafts[0]
+
     @pytest.mark.parametrize(
         ['framework', 'lot', 'user', 'result'],
         [
@@ -154,6 +389,59 @@ class TestBuyersHelpers(object):
         assert unanswered_required == 2
         assert unanswered_optional == 2
 
+    def test_get_brief_completeness(self):
+        brief = {
+            'status': 'draft',
+            'frameworkSlug': 'dos',
+            'lotSlug': 'digital-specialists',
+            'required1': True
+        }
+        content = content_loader.get_manifest('dos', 'edit_brief').filter(
+            {'lot': 'digital-specialists'}
+        )
+
+        completeness = helpers.buyers_helpers.get_brief_completeness(content.summary(brief))
+
+        assert completeness.unanswered_required == 2
+        assert completeness.unanswered_optional == 2
+        assert completeness.previewable is False
+        assert completeness.publishable is False
+        assert completeness.sections == {
+            'section-1': (0, 1, 'done'),
+            'section-2': (1, 0, 'to_do'),
+            'section-4': (0, 1, 'optional'),
+            'section-5': (1, 0, 'to_do'),
+        }
+        assert completeness.sections_status == {
+            'previewable': False,
+            'publishable': False,
+            'section-1': 'done',
+            'section-2': 'to_do',
+            'section-4': 'optional',
+            'section-5': 'to_do',
+        }
+
+    def test_get_brief_completeness_for_finished_brief(self):
+        brief = {
+            'status': 'draft',
+            'frameworkSlug': 'dos',
+            'lotSlug': 'digital-specialists',
+            'required1': True,
+            'required2': True,
+            'required3_1': 'Yes',
+            'required3_2': 'Yes',
+        }
+        content = content_loader.get_manifest('dos', 'edit_brief').filter(
+            {'lot': 'digital-specialists'}
+        )
+
+        completeness = helpers.buyers_helpers.get_brief_completeness(content.summary(brief))
+
+        assert completeness.unanswered_required == 0
+        assert completeness.previewable is True
+        assert completeness.publishable is True
+        assert completeness.sections_status['section-5'] == 'done'
+
     def test_add_unanswered_counts_to_briefs(self):
         briefs = [{
             'status': 'draft',
@@ -171,6 +459,104 @@ class TestBuyersHelpers(object):
             'unanswered_optional': 2
         }]
 
+    @pytest.mark.parametrize('brief', [
+        {},
+        {'required1': True},
+        {'required1': True, 'optional1': '', 'required2': [], 'required3_1': 'Yes'},
+        {'required1': True, 'required2': True, 'optional2': 'Yes', 'required3_1': 'Yes', 'required3_2': 'Yes'},
+    ])
+    def test_unanswered_question_index_matches_summary_counts(self, brief):
+        content = content_loader.get_manifest('dos', 'edit_brief').filter({'lot': 'digital-specialists'})
+
+        index = helpers.buyers_helpers.get_unanswered_question_index(content)
+
+        assert index.count_unanswered_questions(brief) == helpers.buyers_helpers.count_unanswered_questions(
+            content.summary(brief)
+        )
+
+    def test_unanswered_question_index_is_built_once_per_manifest(self):
+        content = content_loader.get_manifest('dos', 'edit_brief').filter({'lot': 'digital-specialists'})
+
+        index = helpers.buyers_helpers.get_unanswered_question_index(content)
+
+        assert helpers.buyers_helpers.get_unanswered_question_index(content) is index
+
+    def test_unanswered_question_index_is_not_used_if_it_disagrees_about_an_answered_brief(self):
+        content = content_loader.get_manifest('dos', 'edit_brief').filter({'lot': 'digital-specialists'})
+        count_unanswered_questions = helpers.buyers_helpers.UnansweredQuestionIndex.count_unanswered_questions
+
+        with mock.patch.object(
+            helpers.buyers_helpers.UnansweredQuestionIndex,
+            'count_unanswered_questions',
+            autospec=True,
+            side_effect=lambda index, brief: count_unanswered_questions(index, brief) if not brief else (99, 99),
+        ):
+            assert helpers.buyers_helpers.get_unanswered_question_index(content) is None
+
+    def test_add_unanswered_counts_to_briefs_falls_back_to_summary_if_index_disagrees(self):
+        briefs = [{'frameworkSlug': 'dos', 'lotSlug': 'digital-specialists', 'required1': True}]
+
+        with mock.patch.object(
+            helpers.buyers_helpers.UnansweredQuestionIndex, 'count_unanswered_questions', return_value=(99, 99)
+        ):
+            helpers.buyers_helpers.add_unanswered_counts_to_briefs(briefs, content_loader)
+
+        assert (briefs[0]['unanswered_required'], briefs[0]['unanswered_optional']) == (2, 2)
+
+    def test_manifest_index_finds_sections_and_questions(self):
+        content = content_loader.get_manifest('dos', 'edit_brief').filter({'lot': 'digital-specialists'})
+
+        content_index = helpers.buyers_helpers.get_manifest_index(content)
+
+        assert content_index.get_section('section-2') is content.get_section('section-2')
+        assert content_index.get_question('required2') is content.get_question('required2')
+        assert content_index.get_question('required3_1') is content.get_question('required3_1')
+        assert content_index.get_question_section('required3_1').slug == 'section-5'
+
+    def test_manifest_index_only_looks_in_the_given_section(self):
+        content = content_loader.get_manifest('dos', 'edit_brief').filter({'lot': 'digital-specialists'})
+
+        content_index = helpers.buyers_helpers.get_manifest_index(content)
+
+        assert content_index.get_question('required1', section_slug='section-1').id == 'required1'
+        assert content_index.get_question('required1', section_slug='section-2') is None
+
+    def test_manifest_index_for_missing_section_or_question(self):
+        content = content_loader.get_manifest('dos', 'edit_brief').filter({'lot': 'digital-specialists'})
+
+        content_index = helpers.buyers_helpers.get_manifest_index(content)
+
+        assert content_index.get_section('section-3') is None
+        assert content_index.get_question('not-a-question') is None
+        assert content_index.get_question_section('not-a-question') is None
+
+    def test_manifest_index_finds_pricing_questions_by_field_name(self):
+        content = ContentManifest([{
+            'slug': 'budget',
+            'name': 'Budget',
+            'questions': [{
+                'id': 'budgetRange',
+                'type': 'pricing',
+                'question': 'Budget range',
+                'fields': {'minimum_price': 'budgetMin', 'maximum_price': 'budgetMax'},
+            }],
+        }])
+
+        content_index = helpers.buyers_helpers.get_manifest_index(content)
+
+        for field_name in ['budgetRange', 'budgetMin', 'budgetMax']:
+            assert content_index.get_question(field_name) is content.get_question(field_name)
+            assert content_index.get_question(field_name, section_slug='budget').id == 'budgetRange'
+            assert content_index.get_question_section(field_name).slug == 'budget'
+
+    def test_manifest_index_is_built_once_per_manifest(self):
+        content = content_loader.get_manifest('dos', 'edit_brief').filter({'lot': 'digital-specialists'})
+
+        content_index = helpers.buyers_helpers.get_manifest_index(content)
+
+        assert helpers.buyers_helpers.get_manifest_index(content) is content_index
+        assert helpers.buyers_helpers.get_unanswered_question_index(content) is not content_index
+
     def test_get_sorted_responses_for_brief(self):
         data_api_client = mock.Mock()
         data_api_client.find_brief_responses.return_value = {
@@ -0,0 +1,324 @@
+import shutil
+import threading
+
+import mock
+import pytest
+
+from dmcontent.content_loader import read_yaml
+from dmcontent.errors import ContentNotFoundError
+
+from app.main.helpers.shared_content_loader import ContentLoaderFrozenError, SharedContentLoader, _LazyTemplateField
+
+
+@pytest.fixture
+def content_loader():
+    loader = SharedContentLoader('tests/fixtures/content')
+    loader.load_manifest('dos', 'data', 'edit_brief')
+    return loader.freeze()
+
+
+@pytest.fixture
+def lazy_content_loader():
+    loader = SharedContentLoader('tests/fixtures/content')
+    loader.register_manifest('dos', 'data', 'edit_brief')
+    loader.register_manifest('g6', 'data', 'manifest')
+    return loader.freeze()
+
+
+class TestSharedContentLoader(object):
+    def test_freeze_returns_the_loader(self):
+        loader = SharedContentLoader('tests/fixtures/content')
+
+        assert loader.frozen is False
+        assert loader.freeze() is loader
+        assert loader.frozen is True
+
+    def test_can_get_manifest_loaded_before_freezing(self, content_loader):
+        content = content_loader.get_manifest('dos', 'edit_brief')
+
+        assert [section.slug for section in content] == ['section-1', 'section-2', 'section-4', 'section-5']
+
+    def test_reloading_an_already_loaded_manifest_is_allowed_when_frozen(self, content_loader):
+        content_loader.load_manifest('dos', 'data', 'edit_brief')
+
+    def test_cannot_load_new_manifest_when_frozen(self, content_loader):
+        with pytest.raises(ContentLoaderFrozenError):
+            content_loader.load_manifest('dos', 'data', 'edit_brief_fail')
+
+    def test_cannot_load_new_messages_when_frozen(self, content_loader):
+        with pytest.raises(ContentLoaderFrozenError):
+            content_loader.load_messages('dos', ['urls'])
+
+    def test_cannot_load_metadata_when_frozen(self, content_loader):
+        with pytest.raises(ContentLoaderFrozenError):
+            content_loader.load_metadata('dos', ['copy_services'])
+
+    def test_manifests_are_independent_of_the_shared_content(self, content_loader):
+        brief = {'required1': True}
+        first = content_loader.get_manifest('dos', 'edit_brief').filter({'lot': 'digital-specialists'})
+        first.summary(brief)
+        first.sections[0].questions.pop()
+        first.sections[0].name = 'Changed'
+
+        second = content_loader.get_manifest('dos', 'edit_brief')
+
+        assert second.sections[0].name == 'Section 1'
+        assert [question.id for question in second.sections[0].questions] == ['required1', 'optional1']
+
+
+class TestSharedContentLoaderMessages(object):
+    @pytest.fixture
+    def content_loader(self):
+        loader = SharedContentLoader('tests/fixtures/content')
+        loader.load_messages('dos', ['urls'])
+        return loader.freeze()
+
+    def test_get_message_reads_from_index_once_frozen(self, content_loader):
+        with mock.patch('dmcontent.content_loader.ContentLoader.get_message') as get_message:
+            url = content_loader.get_message('dos', 'urls', 'call_off_contract_url')
+
+        assert get_message.called is False
+        assert url == (
+            'https://www.gov.uk/government/publications/digital-outcomes-and-specialists-call-off-contract'
+        )
+
+    def test_get_message_for_unknown_key_returns_none(self, content_loader):
+        assert content_loader.get_message('dos', 'urls', 'not_a_url') is None
+
+    def test_get_message_for_unloaded_block_raises(self, content_loader):
+        with pytest.raises(ContentNotFoundError):
+            content_loader.get_message('dos', 'homepage_sidebar', 'in_review')
+
+    def test_get_whole_message_block(self, content_loader):
+        message = content_loader.get_message('dos', 'urls')
+
+        assert message.framework_agreement_url == (
+            'https://www.gov.uk/government/publications/digital-outcomes-and-specialists-framework-agreement'
+        )
+
+    def test_loading_already_loaded_messages_is_allowed_when_frozen(self, content_loader):
+        content_loader.load_messages('dos', ['urls'])
+
+
+class TestSharedContentManifest(object):
+    def test_filtering_by_lot_is_cached(self, content_loader):
+        first = content_loader.get_manifest('dos', 'edit_brief').filter({'lot': 'digital-specialists'})
+        second = content_loader.get_manifest('dos', 'edit_brief').filter({'lot': 'digital-specialists'})
+
+        assert first is second
+        assert (content_loader.filtered_manifests.hits, content_loader.filtered_manifests.misses) == (1, 1)
+
+    def test_cached_manifest_matches_filtering_afresh(self, content_loader):
+        cached = content_loader.get_manifest('dos', 'edit_brief').filter({'lot': 'digital-outcomes'})
+        uncached = content_loader.get_manifest('dos', 'edit_brief').filter(
+            {'lot': 'digital-outcomes'}, inplace_allowed=True
+        )
+
+        assert cached is not uncached
+        assert [
+            [question.id for question in section.questions] for section in cached
+        ] == [
+            [question.id for question in section.questions] for section in uncached
+        ]
+
+    @pytest.mark.parametrize('lot, dynamic', [('digital-outcomes', True), ('digital-specialists', False)])
+    def test_different_lots_and_dynamic_are_cached_separately(self, content_loader, lot, dynamic):
+        cached = content_loader.get_manifest('dos', 'edit_brief').filter({'lot': 'digital-specialists'})
+
+        assert content_loader.get_manifest('dos', 'edit_brief').filter({'lot': lot}, dynamic=dynamic) is not cached
+
+    def test_filtering_with_other_context_is_not_cached(self, content_loader):
+        context = {'lot': 'digital-specialists', 'required1': True}
+        first = content_loader.get_manifest('dos', 'edit_brief').filter(context)
+        second = content_loader.get_manifest('dos', 'edit_brief').filter(context)
+
+        assert first is not second
+        assert len(content_loader.filtered_manifests) == 0
+
+
+class TestFilteredContentManifest(object):
+    @pytest.fixture
+    def content(self, content_loader):
+        return content_loader.get_manifest('dos', 'edit_brief').filter({'lot': 'digital-specialists'})
+
+    def test_summaries_of_an_unchanged_brief_are_cached(self, content_loader, content):
+        brief = {'id': 1234, 'updatedAt': '2021-01-01T00:00:00.000000Z', 'required1': 'Yes'}
+
+        first = content.summary(brief)
+        second = content_loader.get_manifest('dos', 'edit_brief').filter({'lot': 'digital-specialists'}).summary(
+            dict(brief)
+        )
+
+        assert first is second
+        assert (content_loader.brief_summaries.hits, content_loader.brief_summaries.misses) == (1, 1)
+
+    def test_summary_is_rebuilt_when_brief_is_updated(self, content):
+        brief = {'id': 1234, 'updatedAt': '2021-01-01T00:00:00.000000Z', 'required1': 'Yes'}
+        first = content.summary(brief)
+
+        updated_brief = dict(brief, updatedAt='2021-01-02T00:00:00.000000Z', required1='No')
+        second = content.summary(updated_brief)
+
+        assert second is not first
+        assert first.get_question('required1').value == 'Yes'
+        assert second.get_question('required1').value == 'No'
+
+    def test_cached_summary_is_unaffected_by_changes_to_the_brief(self, content):
+        brief = {'id': 1234, 'updatedAt': '2021-01-01T00:00:00.000000Z', 'required1': 'Yes'}
+        summary = content.summary(brief)
+
+        brief['required1'] = 'Changed'
+
+        assert summary.get_question('required1').value == 'Yes'
+
+    @pytest.mark.parametrize('brief', [{'required1': 'Yes'}, {'id': 1234, 'required1': 'Yes'}])
+    def test_summaries_of_briefs_without_an_id_and_updated_at_are_not_cached(self, content_loader, content, brief):
+        assert content.summary(brief) is not content.summary(brief)
+        assert len(content_loader.brief_summaries) == 0
+
+
+class TestFirstEditableSections(object):
+    def test_get_first_editable_section(self, content_loader):
+        section = content_loader.get_first_editable_section('dos', 'edit_brief', 'digital-specialists')
+
+        assert section.slug == 'section-1'
+        assert section.questions[0].id == 'required1'
+
+    def test_first_editable_section_is_cached(self, content_loader):
+        first = content_loader.get_first_editable_section('dos', 'edit_brief', 'digital-specialists')
+        second = content_loader.get_first_editable_section('dos', 'edit_brief', 'digital-specialists')
+
+        assert first is second
+        assert (content_loader.first_editable_sections.hits, content_loader.first_editable_sections.misses) == (1, 1)
+
+    def test_preload_finds_first_editable_section_for_every_lot(self, lazy_content_loader):
+        lazy_content_loader.preload(['dos'])
+
+        assert ('dos', 'edit_brief', 'digital-outcomes') in lazy_content_loader.first_editable_sections
+        assert ('dos', 'edit_brief', 'digital-specialists') in lazy_content_loader.first_editable_sections
+        assert len(lazy_content_loader.first_editable_sections) == 2
+
+
+class TestSharedContentLoaderLazyLoading(object):
+    def test_registered_manifests_are_not_loaded_up_front(self, lazy_content_loader):
+        assert lazy_content_loader.is_manifest_loaded('dos', 'edit_brief') is False
+        assert lazy_content_loader.is_manifest_loaded('g6', 'manifest') is False
+
+    def test_get_manifest_loads_registered_manifest_on_first_use(self, lazy_content_loader):
+        content = lazy_content_loader.get_manifest('dos', 'edit_brief')
+
+        assert [section.slug for section in content] == ['section-1', 'section-2', 'section-4', 'section-5']
+        assert lazy_content_loader.is_manifest_loaded('dos', 'edit_brief') is True
+        assert lazy_content_loader.is_manifest_loaded('g6', 'manifest') is False
+
+    def test_preload_only_loads_manifests_for_the_given_frameworks(self, lazy_content_loader):
+        lazy_content_loader.preload(['g6'])
+
+        assert lazy_content_loader.is_manifest_loaded('dos', 'edit_brief') is False
+        assert lazy_content_loader.is_manifest_loaded('g6', 'manifest') is True
+
+    def test_cannot_register_manifest_when_frozen(self, lazy_content_loader):
+        with pytest.raises(ContentLoaderFrozenError):
+            lazy_content_loader.register_manifest('dos', 'data', 'edit_brief_fail')
+
+    def test_concurrent_first_uses_only_parse_the_manifest_once(self, lazy_content_loader):
+        barrier = threading.Barrier(4)
+
+        def get_manifest():
+            barrier.wait()
+            lazy_content_loader.get_manifest('dos', 'edit_brief')
+
+        with mock.patch('dmcontent.content_loader.read_yaml', wraps=read_yaml) as read_yaml_mock:
+            threads = [threading.Thread(target=get_manifest) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        manifest_reads = [
+            call for call in read_yaml_mock.call_args_list if call[0][0].endswith('manifests/edit_brief.yml')
+        ]
+        assert len(manifest_reads) == 1
+
+
+class TestSharedContentLoaderSnapshots(object):
+    @pytest.fixture
+    def content_path(self, tmpdir):
+        path = str(tmpdir.join('content'))
+        shutil.copytree('tests/fixtures/content', path)
+        return path
+
+    def _make_loader(self, content_path):
+        loader = SharedContentLoader(content_path)
+        loader.register_manifest('dos', 'data', 'edit_brief')
+        return loader
+
+    def test_manifests_are_loaded_from_an_up_to_date_snapshot(self, content_path):
+        snapshot_path = content_path + '/snapshot.pickle'
+        self._make_loader(content_path).write_snapshot(snapshot_path)
+
+        loader = self._make_loader(content_path)
+        assert loader.load_snapshot(snapshot_path) is True
+        loader.freeze()
+
+        with mock.patch('dmcontent.content_loader.read_yaml') as read_yaml_mock:
+            content = loader.get_manifest('dos', 'edit_brief').filter({'lot': 'digital-specialists'})
+
+        assert read_yaml_mock.called is False
+        assert [section.slug for section in content] == ['section-1', 'section-2', 'section-4', 'section-5']
+        assert content.get_question('required1').question == 'Required 1'
+
+    def test_stale_snapshot_is_ignored(self, content_path):
+        snapshot_path = content_path + '/snapshot.pickle'
+        self._make_loader(content_path).write_snapshot(snapshot_path)
+
+        with open(content_path + '/frameworks/dos/questions/data/required1.yml', 'a') as question_file:
+            question_file.write('\nhint: Changed\n')
+
+        loader = self._make_loader(content_path)
+        assert loader.load_snapshot(snapshot_path) is False
+        assert loader.get_manifest('dos', 'edit_brief').get_question('required1').hint == 'Changed'
+
+    def test_missing_snapshot_is_ignored(self, content_path):
+        loader = self._make_loader(content_path)
+
+        assert loader.load_snapshot(content_path + '/snapshot.pickle') is False
+        assert [section.slug for section in loader.get_manifest('dos', 'edit_brief')] == [
+            'section-1', 'section-2', 'section-4', 'section-5'
+        ]
+
+    def test_unreadable_snapshot_is_ignored(self, content_path):
+        snapshot_path = content_path + '/snapshot.pickle'
+        with open(snapshot_path, 'wb') as snapshot_file:
+            snapshot_file.write(b'not a snapshot')
+
+        assert self._make_loader(content_path).load_snapshot(snapshot_path) is False
+
+
+class TestLazyTemplateField(object):
+    def test_concurrent_first_renders_compile_the_template_once_at_a_time(self):
+        field = _LazyTemplateField('Some **markdown**', True)
+        barrier = threading.Barrier(4)
+        compiling = []
+        overlapped = []
+
+        def make_template(source):
+            overlapped.append(bool(compiling))
+            compiling.append(source)
+            threading.Event().wait(timeout=0.01)
+            compiling.remove(source)
+            return source
+
+        def render():
+            barrier.wait()
+            field.template
+
+        with mock.patch.object(_LazyTemplateField, 'make_template', side_effect=make_template):
+            threads = [threading.Thread(target=render) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert overlapped == [False]
+        assert field.template == 'Some **markdown**'
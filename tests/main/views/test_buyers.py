@@ -221,6 +221,54 @@ class TestBuyerDashboard(BaseApplicationTest):
         assert "View responses" not in unsuccessful_row_cells[2]
         assert "Let suppliers know the outcome" not in unsuccessful_row_cells[2]
 
+    def test_closed_briefs_are_paginated(self):
+        briefs = find_briefs_mock()
+        closed_brief = next(brief for brief in briefs['briefs'] if brief['status'] == 'closed')
+        briefs['briefs'] = [
+            dict(closed_brief, id=100 + i, title="Closed brief {}".format(i),
+                 applicationsClosedAt="2016-02-{:02d}T12:00:00.000000Z".format(28 - i))
+            for i in range(buyers.CLOSED_BRIEFS_PER_PAGE + 1)
+        ]
+        self.data_api_client.find_briefs.return_value = briefs
+
+        res = self.client.get(self.briefs_dashboard_url)
+        document = html.fromstring(res.get_data(as_text=True))
+
+        assert res.status_code == 200
+        assert len(document.xpath('//table[@id="published_requirements"]/tbody/tr')) == buyers.CLOSED_BRIEFS_PER_PAGE
+        assert document.xpath('//nav[@id="closed_requirements_pagination"]//a/@href') == [
+            self.briefs_dashboard_url + '?page=2'
+        ]
+
+        res = self.client.get(self.briefs_dashboard_url + '?page=2')
+        document = html.fromstring(res.get_data(as_text=True))
+
+        assert res.status_code == 200
+        closed_rows = document.xpath('//table[@id="published_requirements"]/tbody/tr')
+        assert [row.xpath('.//td')[0].text_content().strip() for row in closed_rows] == [
+            "Closed brief {}".format(buyers.CLOSED_BRIEFS_PER_PAGE)
+        ]
+        assert document.xpath('//nav[@id="closed_requirements_pagination"]//a/@href') == [
+            self.briefs_dashboard_url + '?page=1'
+        ]
+
+    def test_closed_briefs_are_not_paginated_if_they_fit_on_one_page(self):
+        res = self.client.get(self.briefs_dashboard_url)
+
+        assert res.status_code == 200
+        assert not html.fromstring(res.get_data(as_text=True)).xpath('//nav[@id="closed_requirements_pagination"]')
+
+    @pytest.mark.parametrize('page', ['0', '2'])
+    def test_404_for_page_of_closed_briefs_that_does_not_exist(self, page):
+        res = self.client.get(self.briefs_dashboard_url + '?page=' + page)
+
+        assert res.status_code == 404
+
+    def test_briefs_are_fetched_in_a_single_request(self):
+        self.client.get(self.briefs_dashboard_url)
+
+        assert self.data_api_client.find_briefs.call_args_list == [mock.call(123)]
+
 
 class TestBuyerRoleRequired(BaseApplicationTest):
 
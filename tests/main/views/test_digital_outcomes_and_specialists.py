@@ -5,6 +5,8 @@ import pytest
 from lxml import html
 from dmtestutils.api_model_stubs import FrameworkStub, LotStub
 
+from app.main.helpers.buyers_helpers import configure_framework_cache, invalidate_cached_frameworks
+
 from ...helpers import BaseApplicationTest
 
 
@@ -157,3 +159,61 @@ class TestStartStudiosInfoPage(BaseApplicationTest):
         res = self.client.get(
             "/buyers/frameworks/digital-outcomes-and-specialists-4/requirements/user-research-studios")
         assert res.status_code == 404
+
+
+class TestStartBriefInfoPageWithFrameworkCache(BaseApplicationTest):
+    # the framework cache is off in the test config, so that each test can give the views its own framework
+
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.data_api_client_patch = mock.patch(
+            'app.main.views.digital_outcomes_and_specialists.data_api_client', autospec=True
+        )
+        self.data_api_client = self.data_api_client_patch.start()
+        self.data_api_client.get_framework.return_value = FrameworkStub(
+            slug='digital-outcomes-and-specialists-4',
+            status='live',
+            lots=[
+                LotStub(slug='digital-specialists', allows_brief=True).response(),
+                LotStub(slug='digital-outcomes', allows_brief=False).response(),
+            ]
+        ).single_result_response()
+        self.app.config['DM_FRAMEWORK_CACHE_TTL'] = 300
+        configure_framework_cache(self.app)
+
+    def teardown_method(self, method):
+        self.app.config['DM_FRAMEWORK_CACHE_TTL'] = 0
+        configure_framework_cache(self.app)
+        self.data_api_client_patch.stop()
+        super().teardown_method(method)
+
+    def test_framework_is_only_fetched_once(self):
+        for _ in range(2):
+            res = self.client.get(
+                "/buyers/frameworks/digital-outcomes-and-specialists-4/requirements/digital-specialists")
+            assert res.status_code == 200
+
+        assert self.data_api_client.get_framework.call_count == 1
+
+    def test_lots_of_a_cached_framework_are_still_checked(self):
+        res = self.client.get(
+            "/buyers/frameworks/digital-outcomes-and-specialists-4/requirements/digital-specialists")
+        assert res.status_code == 200
+
+        res = self.client.get(
+            "/buyers/frameworks/digital-outcomes-and-specialists-4/requirements/digital-outcomes")
+        assert res.status_code == 404
+        assert self.data_api_client.get_framework.call_count == 1
+
+    def test_framework_is_fetched_again_once_invalidated(self):
+        res = self.client.get(
+            "/buyers/frameworks/digital-outcomes-and-specialists-4/requirements/digital-specialists")
+        assert res.status_code == 200
+
+        invalidate_cached_frameworks('digital-outcomes-and-specialists-4')
+        self.data_api_client.get_framework.return_value['frameworks']['status'] = 'expired'
+
+        res = self.client.get(
+            "/buyers/frameworks/digital-outcomes-and-specialists-4/requirements/digital-specialists")
+        assert res.status_code == 404
+        assert self.data_api_client.get_framework.call_count == 2
@@ -517,6 +517,20 @@ class TestRequirementsTaskListPageAborts(BaseApplicationTest):
 
         assert res.status_code == 404
 
+    def test_awarded_response_to_another_users_brief_is_not_fetched(self):
+        brief_json = BriefStub(
+            framework_slug="digital-outcomes-and-specialists-4", status="awarded", user_id=234,
+        ).single_result_response()
+        brief_json["briefs"]["awardedBriefResponseId"] = 999
+        self.data_api_client.get_brief.return_value = brief_json
+
+        res = self.client.get(
+            "/buyers/frameworks/digital-outcomes-and-specialists-4/requirements/digital-specialists/1234"
+        )
+
+        assert res.status_code == 404
+        assert self.data_api_client.get_brief_response.called is False
+
     def test_404_if_brief_has_wrong_lot(self):
         res = self.client.get(
             "/buyers/frameworks/digital-outcomes-and-specialists-4/requirements/digital-outcomes/1234"
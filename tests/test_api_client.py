@@ -0,0 +1,585 @@
+import gzip
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import mock
+import pytest
+from dmapiclient import HTTPError, InvalidResponse
+from flask import Flask
+from prometheus_client import REGISTRY
+
+from app.api_client import CachingDataAPIClient
+from app.concurrency import APIExecutor, RequestState, call_with_request_state
+from app.invalidation import InvalidationBus
+from app.json_codec import JSONCodec
+from app.resilience import APIResilience, CircuitOpenError
+from app.response_cache import APIResponseCache
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['DM_API_EXECUTOR_THREADS'] = 4
+    return app
+
+
+@pytest.fixture
+def api_request():
+    with mock.patch('dmapiclient.base.BaseAPIClient._request') as api_request:
+        api_request.side_effect = lambda method, url, data=None, params=None, **kwargs: {'url': url}
+        yield api_request
+
+
+@pytest.fixture
+def data_api_client():
+    return CachingDataAPIClient('http://localhost:5000', 'token')
+
+
+class TestCachingDataAPIClient(object):
+    def test_reads_are_made_once_per_request(self, app, api_request, data_api_client):
+        with app.test_request_context('/'):
+            assert data_api_client.get_brief(1) == {'url': '/briefs/1'}
+            assert data_api_client.get_brief(1) == {'url': '/briefs/1'}
+            data_api_client.get_brief(2)
+
+        assert api_request.call_count == 2
+
+    def test_reads_are_not_cached_between_requests(self, app, api_request, data_api_client):
+        for _ in range(2):
+            with app.test_request_context('/'):
+                data_api_client.get_brief(1)
+
+        assert api_request.call_count == 2
+
+    def test_reads_are_not_cached_outside_a_request(self, api_request, data_api_client):
+        data_api_client.get_brief(1)
+        data_api_client.get_brief(1)
+
+        assert api_request.call_count == 2
+
+    def test_each_caller_gets_its_own_copy(self, app, api_request, data_api_client):
+        with app.test_request_context('/'):
+            data_api_client.get_brief(1)['url'] = 'changed'
+
+            assert data_api_client.get_brief(1) == {'url': '/briefs/1'}
+
+    def test_writes_forget_cached_reads(self, app, api_request, data_api_client):
+        with app.test_request_context('/'):
+            data_api_client.get_brief(1)
+            data_api_client.publish_brief(1, 'user@example.com')
+            data_api_client.get_brief(1)
+
+        assert [call[0][0] for call in api_request.call_args_list] == ['GET', 'POST', 'GET']
+
+    def test_reads_made_by_the_api_executor_share_the_request_cache(self, app, api_request, data_api_client):
+        api_executor = APIExecutor(app)
+
+        with app.test_request_context('/'):
+            data_api_client.get_brief(1)
+            api_executor.submit(data_api_client.get_brief, 1).result()
+
+        assert api_request.call_count == 1
+
+    def test_calls_made_for_a_request_without_its_context_share_its_cache(self, app, api_request, data_api_client):
+        with app.test_request_context('/') as request_context:
+            data_api_client.get_brief(1)
+            request_state = RequestState(request_context.request.environ, {})
+
+        call_with_request_state(request_state, data_api_client.get_brief, 1)
+
+        assert api_request.call_count == 1
+
+    def test_concurrent_identical_reads_are_only_made_once(self, app, api_request, data_api_client):
+        started, release = threading.Event(), threading.Event()
+
+        def slow_request(method, url, data=None, params=None, **kwargs):
+            started.set()
+            release.wait(timeout=1)
+            return {'url': url}
+
+        api_request.side_effect = slow_request
+        results = []
+
+        def get_brief():
+            with app.test_request_context('/'):
+                results.append(data_api_client.get_brief(1))
+
+        first = threading.Thread(target=get_brief)
+        first.start()
+        started.wait(timeout=1)
+        second = threading.Thread(target=get_brief)
+        second.start()
+        # give the second read a chance to join the first before letting it finish
+        second.join(timeout=0.1)
+        release.set()
+        first.join()
+        second.join()
+
+        assert results == [{'url': '/briefs/1'}, {'url': '/briefs/1'}]
+        assert api_request.call_count == 1
+
+    def test_errors_are_raised_and_not_cached(self, app, api_request, data_api_client):
+        api_request.side_effect = [ValueError, {'url': '/briefs/1'}]
+
+        with app.test_request_context('/'):
+            with pytest.raises(ValueError):
+                data_api_client.get_brief(1)
+            assert data_api_client.get_brief(1) == {'url': '/briefs/1'}
+
+
+class _APIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = json.dumps({'briefs': {'id': 1}}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _FakeDataAPIHandler(_APIHandler):
+    """Lists briefs, leaving out any fields not asked for and gzipping them if asked to, like the data API does"""
+
+    with open('tests/fixtures/dos_multiple_briefs_fixture.json') as fixture:
+        BRIEFS = json.load(fixture)
+
+    def do_GET(self):
+        self.server.request_headers.append(self.headers)
+        query = parse_qs(urlsplit(self.path).query)
+        response = dict(self.BRIEFS)
+        if 'fields' in query:
+            fields = query['fields'][0].split(',')
+            response['briefs'] = [
+                {field: brief[field] for field in fields if field in brief} for brief in response['briefs']
+            ]
+
+        body = json.dumps(response).encode('utf-8')
+        self.server.response_sizes.append(len(body))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.server.wire_sizes.append(len(body))
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def fake_data_api():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _FakeDataAPIHandler)
+    server.response_sizes = []
+    server.wire_sizes = []
+    server.request_headers = []
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_calls_made_for_a_request_pass_on_its_tracing_headers(fake_data_api):
+    data_api_client = CachingDataAPIClient('http://127.0.0.1:{}'.format(fake_data_api.server_address[1]), 'token')
+
+    call_with_request_state(RequestState({}, {'DM-Request-ID': 'abc123'}), data_api_client.find_briefs, user_id=1)
+
+    assert fake_data_api.request_headers[0]['DM-Request-ID'] == 'abc123'
+
+
+class TestCachingDataAPIClientProjection(object):
+    @pytest.fixture
+    def data_api_client(self):
+        return CachingDataAPIClient('http://localhost:5000', 'token', supports_projection=True)
+
+    def test_find_briefs_only_fetches_the_fields_asked_for(self, fake_data_api):
+        data_api_client = CachingDataAPIClient(
+            'http://127.0.0.1:{}'.format(fake_data_api.server_address[1]), 'token', supports_projection=True,
+        )
+
+        full = data_api_client.find_briefs(user_id=123)
+        projected = data_api_client.find_briefs(user_id=123, fields=['id', 'status'])
+
+        assert projected['briefs'] == [{'id': brief['id'], 'status': brief['status']} for brief in full['briefs']]
+        assert projected['meta'] == full['meta']
+        assert fake_data_api.response_sizes[1] < fake_data_api.response_sizes[0] / 5
+
+    def test_fields_are_ignored_unless_the_api_supports_them(self, fake_data_api):
+        data_api_client = CachingDataAPIClient('http://127.0.0.1:{}'.format(fake_data_api.server_address[1]), 'token')
+
+        assert data_api_client.find_briefs(user_id=123, fields=['id']) == data_api_client.find_briefs(user_id=123)
+        assert fake_data_api.response_sizes[0] == fake_data_api.response_sizes[1]
+
+    def test_fields_are_left_out_even_if_the_api_sends_them(self, api_request, data_api_client):
+        api_request.side_effect = None
+        api_request.return_value = {'briefResponses': [{'id': 1, 'essentialRequirements': [True], 'supplierName': 'A'}]}
+
+        response = data_api_client.find_brief_responses(brief_id=1, fields=['id', 'essentialRequirements'])
+
+        assert response == {'briefResponses': [{'id': 1, 'essentialRequirements': [True]}]}
+        assert api_request.call_args[1]['params']['fields'] == 'id,essentialRequirements'
+
+    def test_projected_and_full_reads_are_cached_separately(self, app, api_request, data_api_client):
+        api_request.side_effect = None
+        api_request.return_value = {'briefs': []}
+
+        with app.test_request_context('/'):
+            data_api_client.find_briefs(user_id=123, fields=['id'])
+            data_api_client.find_briefs(user_id=123)
+
+        assert api_request.call_count == 2
+
+
+class TestCachingDataAPIClientConnectionPool(object):
+    @pytest.fixture
+    def api_url(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _APIHandler)
+        thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.01}, daemon=True)
+        thread.start()
+        yield 'http://127.0.0.1:{}'.format(server.server_address[1])
+        server.shutdown()
+        server.server_close()
+
+    @staticmethod
+    def _get_metric(name):
+        return REGISTRY.get_sample_value(name) or 0
+
+    def test_connections_are_reused_between_calls(self, api_url):
+        data_api_client = CachingDataAPIClient(api_url, 'token')
+        checkouts = self._get_metric('data_api_connection_pool_checkouts_total')
+        new_connections = self._get_metric('data_api_connection_pool_new_connections_total')
+
+        for _ in range(3):
+            assert data_api_client.get_brief(1) == {'briefs': {'id': 1}}
+
+        assert self._get_metric('data_api_connection_pool_checkouts_total') - checkouts == 3
+        assert self._get_metric('data_api_connection_pool_new_connections_total') - new_connections == 1
+
+    def test_waiting_for_a_connection_from_a_blocking_pool_times_out(self, api_url):
+        data_api_client = CachingDataAPIClient(api_url, 'token', pool_maxsize=1, pool_block=True, pool_timeout=0.01)
+        data_api_client.get_brief(1)
+        adapter = data_api_client._requests_retry_session(retry_read_timeouts=True).get_adapter(api_url)
+        pool, = adapter.poolmanager.pools._container.values()
+        pool._get_conn()
+
+        with pytest.raises(HTTPError) as e:
+            data_api_client.get_brief(1)
+
+        assert e.value.status_code == 503
+
+    def test_pool_is_configured_by_init_app(self, app, api_url):
+        app.config.update({
+            'DM_DATA_API_URL': api_url,
+            'DM_DATA_API_AUTH_TOKEN': 'token',
+            'DM_DATA_API_CONNECT_TIMEOUT': 1,
+            'DM_DATA_API_READ_TIMEOUT': 2,
+            'DM_DATA_API_POOL_MAXSIZE': 3,
+            'DM_DATA_API_POOL_BLOCK': True,
+            'DM_DATA_API_POOL_TIMEOUT': 4,
+            'DM_DATA_API_JSON_CODEC': 'json',
+            'DM_DATA_API_COMPRESSION': True,
+            'DM_DATA_API_BATCH_PATH': '/_batch',
+            'DM_DATA_API_SUPPORTS_PROJECTION': False,
+        })
+        data_api_client = CachingDataAPIClient()
+        data_api_client.init_app(app)
+
+        adapter = data_api_client._requests_retry_session().get_adapter(api_url)
+
+        assert data_api_client.timeout == (1, 2)
+        assert (adapter._pool_maxsize, adapter._pool_block, adapter.pool_timeout) == (3, True, 4)
+        assert adapter.json_codec.name == 'json'
+        assert data_api_client._batch_path == '/_batch'
+        assert data_api_client._requests_retry_session().get_adapter(api_url) is adapter
+
+
+class TestCachingDataAPIClientJSONCodec(object):
+    def test_responses_are_decoded_with_the_json_codec(self, fake_data_api):
+        loads = mock.Mock(side_effect=json.loads)
+        data_api_client = CachingDataAPIClient(
+            'http://127.0.0.1:{}'.format(fake_data_api.server_address[1]), 'token', json_codec=JSONCodec('fake', loads),
+        )
+
+        assert data_api_client.find_briefs(user_id=123) == _FakeDataAPIHandler.BRIEFS
+        assert loads.call_args == mock.call(mock.ANY)
+        assert isinstance(loads.call_args[0][0], bytes)
+
+    def test_decoding_is_measured_per_endpoint(self, fake_data_api):
+        data_api_client = CachingDataAPIClient('http://127.0.0.1:{}'.format(fake_data_api.server_address[1]), 'token')
+        labels = {'endpoint': 'GET /briefs'}
+        decodes = REGISTRY.get_sample_value('data_api_response_decode_seconds_count', labels) or 0
+        decoded_bytes = REGISTRY.get_sample_value('data_api_response_size_bytes_sum', labels) or 0
+
+        data_api_client.find_briefs(user_id=123)
+
+        assert REGISTRY.get_sample_value('data_api_response_decode_seconds_count', labels) - decodes == 1
+        assert REGISTRY.get_sample_value('data_api_response_size_bytes_sum', labels) - decoded_bytes == \
+            fake_data_api.response_sizes[0]
+
+    def test_invalid_json_raises_invalid_response(self, fake_data_api):
+        data_api_client = CachingDataAPIClient(
+            'http://127.0.0.1:{}'.format(fake_data_api.server_address[1]),
+            'token',
+            json_codec=JSONCodec('fake', mock.Mock(side_effect=ValueError)),
+        )
+
+        with pytest.raises(InvalidResponse):
+            data_api_client.find_briefs(user_id=123)
+
+    def test_later_readers_decode_the_body_again_rather_than_copying(self, app, fake_data_api):
+        data_api_client = CachingDataAPIClient('http://127.0.0.1:{}'.format(fake_data_api.server_address[1]), 'token')
+
+        with app.test_request_context('/'), mock.patch('app.api_client.copy.deepcopy') as deepcopy:
+            data_api_client.find_briefs(user_id=123)['briefs'] = []
+
+            assert data_api_client.find_briefs(user_id=123) == _FakeDataAPIHandler.BRIEFS
+
+        assert deepcopy.called is False
+        assert len(fake_data_api.response_sizes) == 1
+
+
+class TestCachingDataAPIClientCompression(object):
+    @staticmethod
+    def _get_wire_bytes(encoding):
+        labels = {'endpoint': 'GET /briefs', 'encoding': encoding}
+        return REGISTRY.get_sample_value('data_api_response_wire_bytes_total', labels) or 0
+
+    def test_responses_are_gzipped(self, fake_data_api):
+        data_api_client = CachingDataAPIClient('http://127.0.0.1:{}'.format(fake_data_api.server_address[1]), 'token')
+        wire_bytes = self._get_wire_bytes('gzip')
+
+        assert data_api_client.find_briefs(user_id=123) == _FakeDataAPIHandler.BRIEFS
+        assert fake_data_api.wire_sizes[0] < fake_data_api.response_sizes[0] / 2
+        assert self._get_wire_bytes('gzip') - wire_bytes == fake_data_api.wire_sizes[0]
+
+    def test_compression_can_be_turned_off(self, fake_data_api):
+        data_api_client = CachingDataAPIClient(
+            'http://127.0.0.1:{}'.format(fake_data_api.server_address[1]), 'token', compression=False,
+        )
+        wire_bytes = self._get_wire_bytes('identity')
+
+        assert data_api_client.find_briefs(user_id=123) == _FakeDataAPIHandler.BRIEFS
+        assert fake_data_api.wire_sizes == fake_data_api.response_sizes
+        assert self._get_wire_bytes('identity') - wire_bytes == fake_data_api.wire_sizes[0]
+
+
+class _FakeBatchDataAPIHandler(_APIHandler):
+    """Serves frameworks and briefs, individually or several at a time from a batch endpoint at /_batch"""
+
+    def _get(self, path):
+        framework_match = re.match(r'^/frameworks/([^/]+)$', path)
+        if framework_match:
+            return 200, {'frameworks': {'slug': framework_match.group(1)}}
+        brief_match = re.match(r'^/briefs/(\d+)$', path)
+        if brief_match and brief_match.group(1) != '404':
+            return 200, {'briefs': {'id': int(brief_match.group(1))}}
+        return 404, {'error': 'Not found'}
+
+    def _send(self, status, response):
+        body = json.dumps(response).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.requests.append('GET {}'.format(self.path))
+        self._send(*self._get(self.path))
+
+    def do_POST(self):
+        self.server.requests.append('POST {}'.format(self.path))
+        batch = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if self.path != '/_batch' or not self.server.has_batch_endpoint:
+            return self._send(404, {'error': 'Not found'})
+
+        responses = []
+        for batch_request in batch['requests']:
+            status, body = self._get(batch_request['url'])
+            responses.append({'status': status, 'body': body})
+        self._send(200, {'responses': responses})
+
+
+class TestCachingDataAPIClientPrefetch(object):
+    @pytest.fixture
+    def batch_api(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _FakeBatchDataAPIHandler)
+        server.requests = []
+        server.has_batch_endpoint = True
+        thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.01}, daemon=True)
+        thread.start()
+        yield server
+        server.shutdown()
+        server.server_close()
+
+    @pytest.fixture
+    def data_api_client(self, batch_api):
+        return CachingDataAPIClient(
+            'http://127.0.0.1:{}'.format(batch_api.server_address[1]), 'token', batch_path='/_batch',
+        )
+
+    def test_prefetched_reads_are_made_in_one_batch(self, app, batch_api, data_api_client):
+        with app.test_request_context('/'):
+            data_api_client.prefetch(
+                lambda: data_api_client.get_framework('digital-outcomes-and-specialists-4'),
+                lambda: data_api_client.get_brief(1234),
+            )
+
+            assert data_api_client.get_framework('digital-outcomes-and-specialists-4') == {
+                'frameworks': {'slug': 'digital-outcomes-and-specialists-4'}
+            }
+            assert data_api_client.get_brief(1234) == {'briefs': {'id': 1234}}
+
+        assert batch_api.requests == ['POST /_batch']
+
+    def test_reads_already_made_are_not_batched(self, app, batch_api, data_api_client):
+        with app.test_request_context('/'):
+            data_api_client.get_brief(1234)
+            data_api_client.prefetch(
+                lambda: data_api_client.get_framework('digital-outcomes-and-specialists-4'),
+                lambda: data_api_client.get_brief(1234),
+            )
+
+        assert batch_api.requests == ['GET /briefs/1234']
+
+    def test_failed_reads_in_a_batch_are_made_again_individually(self, app, batch_api, data_api_client):
+        with app.test_request_context('/'):
+            data_api_client.prefetch(
+                lambda: data_api_client.get_framework('digital-outcomes-and-specialists-4'),
+                lambda: data_api_client.get_brief(404),
+            )
+
+            with pytest.raises(HTTPError) as e:
+                data_api_client.get_brief(404)
+
+        assert e.value.status_code == 404
+        assert batch_api.requests == ['POST /_batch', 'GET /briefs/404']
+
+    def test_reads_are_made_individually_if_the_api_has_no_batch_endpoint(self, app, batch_api, data_api_client):
+        batch_api.has_batch_endpoint = False
+
+        for _ in range(2):
+            with app.test_request_context('/'):
+                data_api_client.prefetch(
+                    lambda: data_api_client.get_framework('digital-outcomes-and-specialists-4'),
+                    lambda: data_api_client.get_brief(1234),
+                )
+                data_api_client.get_framework('digital-outcomes-and-specialists-4')
+                data_api_client.get_brief(1234)
+
+        assert batch_api.requests == [
+            'POST /_batch',
+            'GET /frameworks/digital-outcomes-and-specialists-4',
+            'GET /briefs/1234',
+            'GET /frameworks/digital-outcomes-and-specialists-4',
+            'GET /briefs/1234',
+        ]
+
+    def test_nothing_is_prefetched_outside_a_request(self, batch_api, data_api_client):
+        data_api_client.prefetch(
+            lambda: data_api_client.get_framework('digital-outcomes-and-specialists-4'),
+            lambda: data_api_client.get_brief(1234),
+        )
+
+        assert batch_api.requests == []
+
+    def test_only_reads_can_be_prefetched(self, app, data_api_client):
+        with app.test_request_context('/'):
+            with pytest.raises(ValueError):
+                data_api_client.prefetch(lambda: data_api_client.delete_brief(1234))
+
+
+class TestCachingDataAPIClientResponseCache(object):
+    @pytest.fixture
+    def response_cache(self, app):
+        app.config['DM_API_RESPONSE_CACHE_TTLS'] = {'frameworks': 300}
+        response_cache = APIResponseCache()
+        response_cache.init_app(app)
+        return response_cache
+
+    def test_reads_go_through_the_response_cache(self, app, api_request, response_cache):
+        api_request.side_effect = None
+        api_request.return_value = {'frameworks': {'slug': 'g-cloud-12'}}
+        data_api_client = CachingDataAPIClient('http://localhost:5000', 'token', response_cache=response_cache)
+
+        for _ in range(2):
+            with app.test_request_context('/'):
+                assert data_api_client.get_framework('g-cloud-12') == {'frameworks': {'slug': 'g-cloud-12'}}
+
+        assert api_request.call_count == 1
+
+
+class TestCachingDataAPIClientInvalidation(object):
+    BRIEF = {'id': 1234, 'users': [{'id': 123}]}
+
+    @pytest.fixture
+    def handler(self):
+        return mock.Mock()
+
+    @pytest.fixture
+    def data_api_client(self, handler):
+        invalidation_bus = InvalidationBus()
+        invalidation_bus.subscribe(handler)
+        return CachingDataAPIClient('http://localhost:5000', 'token', invalidation_bus=invalidation_bus)
+
+    def test_writes_returning_a_brief_announce_it_has_changed(self, api_request, data_api_client, handler):
+        api_request.side_effect = None
+        api_request.return_value = {'briefs': self.BRIEF}
+
+        data_api_client.publish_brief(1234, 'user@example.com')
+
+        handler.assert_called_once_with(1234, [123])
+
+    def test_writes_not_returning_the_brief_announce_the_one_read_earlier(
+        self, app, api_request, data_api_client, handler
+    ):
+        api_request.side_effect = [{'briefs': self.BRIEF}, {'message': 'done'}]
+
+        with app.test_request_context('/'):
+            data_api_client.get_brief(1234)
+            data_api_client.delete_brief(1234, 'user@example.com')
+
+        handler.assert_called_once_with(1234, [123])
+
+    def test_failed_writes_are_not_announced(self, api_request, data_api_client, handler):
+        api_request.side_effect = HTTPError(mock.Mock(status_code=400))
+
+        with pytest.raises(HTTPError):
+            data_api_client.publish_brief(1234, 'user@example.com')
+
+        assert handler.called is False
+
+    def test_writes_to_other_things_are_not_announced(self, api_request, data_api_client, handler):
+        api_request.side_effect = None
+        api_request.return_value = {'briefResponses': {'id': 1}}
+
+        data_api_client.submit_brief_response(1, 'user@example.com')
+
+        assert handler.called is False
+
+
+class TestCachingDataAPIClientResilience(object):
+    def test_calls_go_through_the_circuit_breaker(self, app, api_request):
+        app.config.update({
+            'DM_DATA_API_CIRCUIT_BREAKER_FAILURES': 1,
+            'DM_DATA_API_CIRCUIT_BREAKER_RESET_TIMEOUT': 30,
+            'DM_DATA_API_HEDGE_PERCENTILE': None,
+            'DM_DATA_API_HEDGE_MIN_SAMPLES': 20,
+        })
+        api_request.side_effect = HTTPError(mock.Mock(status_code=500))
+        data_api_client = CachingDataAPIClient('http://localhost:5000', 'token', resilience=APIResilience(app))
+
+        with pytest.raises(HTTPError):
+            data_api_client.publish_brief(1, 'user@example.com')
+        with pytest.raises(CircuitOpenError):
+            data_api_client.publish_brief(1, 'user@example.com')
+
+        assert api_request.call_count == 1
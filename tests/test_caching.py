@@ -0,0 +1,149 @@
+import threading
+
+import mock
+
+from app.caching import LRUCache, TTLCache
+
+
+class TestLRUCache(object):
+    def test_get_or_set_only_makes_value_once(self):
+        cache = LRUCache(2)
+        make_value = mock.Mock(return_value='value')
+
+        assert cache.get_or_set('key', make_value) == 'value'
+        assert cache.get_or_set('key', make_value) == 'value'
+
+        assert make_value.call_count == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_least_recently_used_entry_is_discarded_when_full(self):
+        cache = LRUCache(2)
+        cache.get_or_set('a', lambda: 1)
+        cache.get_or_set('b', lambda: 2)
+        cache.get_or_set('a', lambda: 1)
+        cache.get_or_set('c', lambda: 3)
+
+        assert 'a' in cache
+        assert 'b' not in cache
+        assert 'c' in cache
+        assert len(cache) == 2
+
+    def test_clear(self):
+        cache = LRUCache(2)
+        cache.get_or_set('a', lambda: 1)
+        cache.clear()
+
+        assert len(cache) == 0
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache(object):
+    def setup_method(self, method):
+        self.clock = FakeClock()
+        self.cache = TTLCache(ttl=10, stale_ttl=60, clock=self.clock)
+
+    def _wait_for_refresh(self):
+        for thread in threading.enumerate():
+            if thread is not threading.current_thread() and thread.daemon:
+                thread.join(timeout=1)
+
+    def test_get_or_set_only_makes_value_once_while_fresh(self):
+        make_value = mock.Mock(return_value='value')
+
+        assert self.cache.get_or_set('key', make_value) == 'value'
+        self.clock.now = 9
+        assert self.cache.get_or_set('key', make_value) == 'value'
+
+        assert make_value.call_count == 1
+        assert (self.cache.hits, self.cache.misses) == (1, 1)
+
+    def test_stale_value_is_returned_while_it_is_refreshed(self):
+        self.cache.get_or_set('key', lambda: 'old')
+        self.clock.now = 15
+
+        assert self.cache.get_or_set('key', lambda: 'new') == 'old'
+        self._wait_for_refresh()
+        assert self.cache.get_or_set('key', lambda: 'newer') == 'new'
+
+    def test_stale_value_is_kept_if_refresh_fails(self):
+        self.cache.get_or_set('key', lambda: 'old')
+        self.clock.now = 15
+
+        assert self.cache.get_or_set('key', mock.Mock(side_effect=ValueError)) == 'old'
+        self._wait_for_refresh()
+        assert self.cache.get_or_set('key', mock.Mock(side_effect=ValueError)) == 'old'
+
+    def test_value_is_made_again_once_too_stale(self):
+        self.cache.get_or_set('key', lambda: 'old')
+        self.clock.now = 71
+
+        assert self.cache.get_or_set('key', lambda: 'new') == 'new'
+        assert (self.cache.hits, self.cache.misses) == (0, 2)
+
+    def test_only_fresh_values_are_in_the_cache(self):
+        self.cache.get_or_set('key', lambda: 'value')
+        assert 'key' in self.cache
+
+        self.clock.now = 10
+        assert 'key' not in self.cache
+
+    def test_invalidate_key(self):
+        self.cache.get_or_set('a', lambda: 1)
+        self.cache.get_or_set('b', lambda: 2)
+
+        self.cache.invalidate('a')
+
+        assert 'a' not in self.cache
+        assert 'b' in self.cache
+
+    def test_invalidate_everything(self):
+        self.cache.get_or_set('a', lambda: 1)
+        self.cache.get_or_set('b', lambda: 2)
+
+        self.cache.invalidate()
+
+        assert len(self.cache) == 0
+
+    def test_zero_ttl_turns_caching_off(self):
+        self.cache.configure(ttl=0)
+        make_value = mock.Mock(return_value='value')
+
+        self.cache.get_or_set('key', make_value)
+        self.cache.get_or_set('key', make_value)
+
+        assert make_value.call_count == 2
+        assert len(self.cache) == 0
+
+    def test_entries_too_stale_to_use_are_dropped(self):
+        self.cache.get_or_set('a', lambda: 1)
+        self.clock.now = 71
+
+        self.cache.get_or_set('b', lambda: 2)
+
+        assert 'a' not in self.cache
+        assert len(self.cache) == 1
+
+    def test_entries_set_longest_ago_are_dropped_when_full(self):
+        self.cache.configure(ttl=10, stale_ttl=60, maxsize=2)
+        for key in ['a', 'b', 'c']:
+            self.cache.get_or_set(key, lambda: key)
+
+        assert 'a' not in self.cache
+        assert 'b' in self.cache
+        assert 'c' in self.cache
+
+    def test_value_made_while_invalidated_is_not_cached(self):
+        def make_value():
+            self.cache.invalidate('key')
+            return 'stale'
+
+        assert self.cache.get_or_set('key', make_value) == 'stale'
+        assert 'key' not in self.cache
+        assert self.cache.get_or_set('key', lambda: 'fresh') == 'fresh'
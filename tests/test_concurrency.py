@@ -0,0 +1,72 @@
+import threading
+
+import mock
+import pytest
+from flask import Flask, has_request_context
+
+from app.concurrency import APIExecutor, get_request_state
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['DM_API_EXECUTOR_THREADS'] = 4
+    return app
+
+
+class TestAPIExecutor(object):
+    def test_run_returns_results_in_order(self, app):
+        executor = APIExecutor(app)
+
+        assert executor.run(lambda: 1, lambda: 2, lambda: 3) == [1, 2, 3]
+
+    def test_run_makes_calls_at_the_same_time(self, app):
+        executor = APIExecutor(app)
+        barrier = threading.Barrier(3, timeout=1)
+
+        # each call waits for the others to start, so this would time out if they were made one after the other
+        assert sorted(executor.run(barrier.wait, barrier.wait, barrier.wait)) == [0, 1, 2]
+
+    def test_run_raises_first_error_once_all_calls_have_finished(self, app):
+        executor = APIExecutor(app)
+        finished = mock.Mock()
+
+        with pytest.raises(ValueError):
+            executor.run(mock.Mock(side_effect=ValueError), mock.Mock(side_effect=KeyError), finished)
+
+        assert finished.called is True
+
+    def test_calls_have_the_request_state_but_not_the_request_context(self, app):
+        executor = APIExecutor(app)
+
+        with app.test_request_context('/buyers?page=2') as request_context:
+            request_state, had_request_context = executor.submit(
+                lambda: (get_request_state(), has_request_context())
+            ).result()
+
+        assert request_state.environ is request_context.request.environ
+        assert had_request_context is False
+
+    def test_calls_made_outside_a_request_have_no_request_state(self, app):
+        executor = APIExecutor(app)
+
+        assert executor.submit(get_request_state).result() is None
+
+    def test_init_app_shuts_down_the_previous_pool(self, app):
+        executor = APIExecutor(app)
+        previous_pool = executor._executor
+
+        executor.init_app(app)
+
+        assert previous_pool._shutdown is True
+        assert executor.run(lambda: 1, lambda: 2) == [1, 2]
+
+    def test_calls_are_made_straight_away_before_init_app(self):
+        executor = APIExecutor()
+        call = mock.Mock(return_value='result')
+
+        future = executor.submit(call, 1, key='value')
+
+        assert future.done() is True
+        assert future.result() == 'result'
+        call.assert_called_once_with(1, key='value')
@@ -0,0 +1,74 @@
+import threading
+import time
+
+import mock
+
+from app.invalidation import InvalidationBus
+from app.response_cache import LocalRedis
+
+
+BRIEF = {'id': 1234, 'users': [{'id': 123}, {'id': 456}]}
+
+
+def _wait_until(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+class TestInvalidationBus(object):
+    def test_handlers_on_this_node_are_called_straight_away(self):
+        bus = InvalidationBus()
+        handler = bus.subscribe(mock.Mock())
+
+        bus.brief_changed(BRIEF)
+
+        handler.assert_called_once_with(1234, [123, 456])
+
+    def test_failing_handler_does_not_stop_the_others(self):
+        bus = InvalidationBus()
+        bus.subscribe(mock.Mock(side_effect=ValueError))
+        handler = bus.subscribe(mock.Mock())
+
+        bus.brief_changed(BRIEF)
+
+        assert handler.called is True
+
+    def test_changes_are_passed_on_to_other_nodes(self):
+        local_redis = LocalRedis()
+        this_node, other_node = InvalidationBus(local_redis), InvalidationBus(local_redis)
+        handled = threading.Event()
+        other_node_handler = other_node.subscribe(mock.Mock(side_effect=lambda *args: handled.set()))
+
+        other_node.start_listening()
+        _wait_until(lambda: local_redis._pubsubs and local_redis._pubsubs[0].channels)
+        this_node.brief_changed(BRIEF)
+
+        assert handled.wait(timeout=2)
+        other_node_handler.assert_called_once_with(1234, [123, 456])
+
+    def test_changes_published_by_this_node_are_not_handled_twice(self):
+        bus = InvalidationBus()
+        handler = bus.subscribe(mock.Mock())
+
+        bus._handle_message('{{"node": "{}", "briefId": 1234, "userIds": [123]}}'.format(bus.node_id))
+        bus._handle_message('{"node": "another-node", "briefId": 1234, "userIds": [123]}')
+
+        handler.assert_called_once_with(1234, [123])
+
+    def test_malformed_messages_are_ignored(self):
+        bus = InvalidationBus()
+        handler = bus.subscribe(mock.Mock())
+
+        bus._handle_message('not json')
+
+        assert handler.called is False
+
+    def test_listener_is_only_started_once(self):
+        bus = InvalidationBus(LocalRedis())
+
+        bus.start_listening()
+        listener = bus._listener
+        bus.start_listening()
+
+        assert bus._listener is listener
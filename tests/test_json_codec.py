@@ -0,0 +1,37 @@
+import json
+
+import mock
+import pytest
+
+from app.json_codec import JSON_CODEC_LOADERS, STDLIB_JSON_CODEC, get_json_codec
+
+
+class TestGetJSONCodec(object):
+    def test_stdlib_codec(self):
+        codec = get_json_codec('json')
+
+        assert codec is STDLIB_JSON_CODEC
+        assert codec.loads(b'{"briefs": []}') == {'briefs': []}
+        with pytest.raises(ValueError):
+            codec.loads(b'not json')
+
+    def test_fastest_installed_codec_is_used_by_default(self):
+        def not_installed():
+            raise ImportError
+
+        with mock.patch.dict(JSON_CODEC_LOADERS, {'orjson': not_installed, 'ujson': not_installed}):
+            assert get_json_codec() is STDLIB_JSON_CODEC
+
+    @pytest.mark.parametrize('name', ['orjson', 'ujson'])
+    def test_other_codecs_decode_like_the_stdlib(self, name):
+        pytest.importorskip(name)
+        codec = get_json_codec(name)
+        payload = json.dumps({'briefs': [{'id': 1, 'title': 'Café', 'essentialRequirements': [True, False]}]})
+
+        assert codec.loads(payload.encode('utf-8')) == json.loads(payload)
+        with pytest.raises(ValueError):
+            codec.loads(b'not json')
+
+    def test_unknown_codec(self):
+        with pytest.raises(KeyError):
+            get_json_codec('pickle')
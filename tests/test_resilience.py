@@ -0,0 +1,210 @@
+import threading
+
+import mock
+import pytest
+from dmapiclient import HTTPError
+from flask import Flask, has_request_context
+
+from app.concurrency import get_request_state
+from app.resilience import APIResilience, CircuitBreaker, CircuitOpenError, LatencyWindow
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def _api_error(status_code):
+    return HTTPError(mock.Mock(status_code=status_code))
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update({
+        'DM_DATA_API_CIRCUIT_BREAKER_FAILURES': 3,
+        'DM_DATA_API_CIRCUIT_BREAKER_RESET_TIMEOUT': 30,
+        'DM_DATA_API_HEDGE_PERCENTILE': None,
+        'DM_DATA_API_HEDGE_MIN_SAMPLES': 5,
+        'DM_DATA_API_HEDGE_THREADS': 4,
+    })
+    return app
+
+
+class TestCircuitBreaker(object):
+    def test_opens_after_failures_in_a_row(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+
+        assert breaker.record_failure() is False
+        breaker.record_success()
+        assert breaker.record_failure() is False
+        assert breaker.record_failure() is False
+        assert breaker.allow_request() is True
+        assert breaker.record_failure() is True
+        assert breaker.allow_request() is False
+
+    def test_allows_a_single_trial_call_after_the_reset_timeout(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+        breaker.record_failure()
+
+        clock.now = 30
+        assert breaker.allow_request() is True
+        assert breaker.allow_request() is False
+
+        breaker.record_success()
+        assert breaker.allow_request() is True
+
+    def test_failed_trial_call_opens_it_again(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=clock)
+        for _ in range(3):
+            breaker.record_failure()
+
+        clock.now = 30
+        breaker.allow_request()
+        assert breaker.record_failure() is True
+
+        clock.now = 59
+        assert breaker.allow_request() is False
+
+
+class TestLatencyWindow(object):
+    def test_percentile(self):
+        latencies = LatencyWindow()
+        for duration in range(1, 101):
+            latencies.add(duration)
+
+        assert latencies.percentile(95) == 95
+        assert latencies.percentile(50) == 50
+
+    def test_percentile_needs_enough_samples(self):
+        latencies = LatencyWindow()
+        latencies.add(1)
+
+        assert latencies.percentile(95, min_samples=2) is None
+
+
+class TestAPIResilience(object):
+    @pytest.mark.parametrize('method, url, endpoint', [
+        ('GET', 'http://localhost/briefs/1234', 'GET /briefs/:id'),
+        ('POST', '/briefs/1234/publish', 'POST /briefs/:id/publish'),
+        ('GET', '/briefs?user_id=123', 'GET /briefs'),
+        ('GET', '/frameworks/digital-outcomes-and-specialists-4', 'GET /frameworks/digital-outcomes-and-specialists-4'),
+    ])
+    def test_get_endpoint(self, method, url, endpoint):
+        assert APIResilience.get_endpoint(method, url) == endpoint
+
+    def test_calls_fail_fast_once_an_endpoint_keeps_failing(self, app):
+        resilience = APIResilience(app)
+        make_request = mock.Mock(side_effect=_api_error(503))
+
+        for _ in range(3):
+            with pytest.raises(HTTPError):
+                resilience.call('GET', '/briefs/1', make_request)
+        with pytest.raises(CircuitOpenError) as e:
+            resilience.call('GET', '/briefs/2', make_request)
+
+        assert e.value.status_code == 503
+        assert make_request.call_count == 3
+        # other endpoints are unaffected
+        assert resilience.call('GET', '/frameworks', lambda: {'frameworks': []}) == {'frameworks': []}
+
+    def test_client_errors_are_not_failures(self, app):
+        resilience = APIResilience(app)
+
+        for _ in range(5):
+            with pytest.raises(HTTPError):
+                resilience.call('GET', '/briefs/1', mock.Mock(side_effect=_api_error(404)))
+
+        assert resilience.call('GET', '/briefs/1', lambda: {'briefs': {}}) == {'briefs': {}}
+
+    def test_circuit_breaker_can_be_turned_off(self, app):
+        app.config['DM_DATA_API_CIRCUIT_BREAKER_FAILURES'] = 0
+        resilience = APIResilience(app)
+        make_request = mock.Mock(side_effect=_api_error(503))
+
+        for _ in range(5):
+            with pytest.raises(HTTPError):
+                resilience.call('GET', '/briefs/1', make_request)
+
+        assert make_request.call_count == 5
+
+    def test_slow_reads_are_hedged(self, app):
+        app.config['DM_DATA_API_HEDGE_PERCENTILE'] = 95
+        resilience = APIResilience(app)
+        for _ in range(5):
+            resilience.call('GET', '/briefs/1', lambda: {})
+
+        first_attempt_made, release_first_attempt = threading.Event(), threading.Event()
+
+        def make_request():
+            if not first_attempt_made.is_set():
+                first_attempt_made.set()
+                release_first_attempt.wait(timeout=1)
+                return 'first'
+            return 'second'
+
+        try:
+            assert resilience.call('GET', '/briefs/1', make_request) == 'second'
+        finally:
+            release_first_attempt.set()
+
+    def test_writes_are_not_hedged(self, app):
+        app.config['DM_DATA_API_HEDGE_PERCENTILE'] = 95
+        resilience = APIResilience(app)
+        for _ in range(5):
+            resilience.call('POST', '/briefs/1', lambda: {})
+        make_request = mock.Mock(return_value={})
+
+        resilience.call('POST', '/briefs/1', make_request)
+
+        assert make_request.call_count == 1
+
+    def test_failed_hedge_uses_other_attempt(self, app):
+        app.config['DM_DATA_API_HEDGE_PERCENTILE'] = 95
+        resilience = APIResilience(app)
+        for _ in range(5):
+            resilience.call('GET', '/briefs/1', lambda: {})
+
+        first_attempt_made = threading.Event()
+
+        def make_request():
+            if not first_attempt_made.is_set():
+                first_attempt_made.set()
+                threading.Event().wait(timeout=0.05)
+                return 'first'
+            raise _api_error(503)
+
+        assert resilience.call('GET', '/briefs/1', make_request) == 'first'
+
+    def test_hedged_attempts_get_the_tracing_headers_but_not_the_request_context(self, app):
+        app.config['DM_DATA_API_HEDGE_PERCENTILE'] = 95
+        resilience = APIResilience(app)
+        for _ in range(5):
+            resilience.call('GET', '/briefs/1', lambda: {})
+
+        def make_request():
+            return has_request_context(), get_request_state()
+
+        with app.test_request_context('/'), mock.patch(
+            'app.concurrency._get_onwards_request_headers', return_value={'DM-Request-ID': 'abc123'},
+        ):
+            had_request_context, request_state = resilience.call('GET', '/briefs/1', make_request)
+
+        assert had_request_context is False
+        assert request_state.onwards_request_headers == {'DM-Request-ID': 'abc123'}
+        assert request_state.environ == {}
+
+    def test_init_app_shuts_down_the_previous_hedge_pool(self, app):
+        app.config['DM_DATA_API_HEDGE_PERCENTILE'] = 95
+        resilience = APIResilience(app)
+        previous_pool = resilience._hedge_executor
+
+        resilience.init_app(app)
+
+        assert previous_pool._shutdown is True
+        assert resilience._hedge_executor is not previous_pool
@@ -0,0 +1,100 @@
+import mock
+import pytest
+import redis
+from flask import Flask
+
+from app.response_cache import APIResponseCache, LocalRedis
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def cache():
+    app = Flask(__name__)
+    app.config['DM_API_RESPONSE_CACHE_TTLS'] = {
+        'frameworks': 300,
+    }
+    cache = APIResponseCache()
+    cache.init_app(app)
+    return cache
+
+
+class TestLocalRedis(object):
+    def test_values_expire(self):
+        clock = FakeClock()
+        local_redis = LocalRedis(clock=clock)
+        local_redis.set('key', 'value', ex=10)
+
+        clock.now = 9
+        assert local_redis.get('key') == 'value'
+        clock.now = 10
+        assert local_redis.get('key') is None
+
+    def test_sets(self):
+        local_redis = LocalRedis()
+
+        assert local_redis.sadd('key', 'a', 'b') == 2
+        assert local_redis.sadd('key', 'b', 'c') == 1
+        assert local_redis.smembers('key') == {'a', 'b', 'c'}
+        assert local_redis.delete('key', 'missing') == 1
+        assert local_redis.smembers('key') == set()
+
+
+class TestAPIResponseCache(object):
+    def test_frameworks_are_cached(self, cache):
+        fetch_response = mock.Mock(return_value={'frameworks': {'slug': 'g-cloud-12'}})
+
+        assert cache.get_or_fetch('/frameworks/g-cloud-12', fetch_response) == {'frameworks': {'slug': 'g-cloud-12'}}
+        assert cache.get_or_fetch('/frameworks/g-cloud-12', fetch_response) == {'frameworks': {'slug': 'g-cloud-12'}}
+        assert fetch_response.call_count == 1
+
+    @pytest.mark.parametrize('url, response', [
+        ('/users/123', {'users': {}}),
+        ('/briefs/1234', {'briefs': {'id': 1234, 'status': 'closed'}}),
+        ('/brief-responses?brief_id=1234', {'briefResponses': []}),
+    ])
+    def test_other_responses_are_not_cached(self, cache, url, response):
+        fetch_response = mock.Mock(return_value=response)
+
+        cache.get_or_fetch(url, fetch_response)
+        cache.get_or_fetch(url, fetch_response)
+
+        assert fetch_response.call_count == 2
+
+    def test_rules_without_a_ttl_are_not_used(self, cache):
+        cache.ttls = {}
+
+        cache.get_or_fetch('/frameworks/g-cloud-12', lambda: {'frameworks': {}})
+
+        assert cache.get('/frameworks/g-cloud-12') is None
+
+    def test_invalidate_tags_forgets_everything_tagged(self, cache):
+        cache.get_or_fetch('/frameworks/g-cloud-12', lambda: {'frameworks': {'slug': 'g-cloud-12'}})
+        cache.get_or_fetch('/frameworks/g-cloud-11', lambda: {'frameworks': {'slug': 'g-cloud-11'}})
+
+        cache.invalidate_tags('framework:g-cloud-12')
+
+        assert cache.get('/frameworks/g-cloud-12') is None
+        assert cache.get('/frameworks/g-cloud-11') is not None
+
+    def test_redis_errors_fall_back_to_the_api(self, cache):
+        cache.redis = mock.Mock(spec_set=LocalRedis)
+        cache.redis.get.side_effect = redis.ConnectionError
+        cache.redis.sadd.side_effect = redis.ConnectionError
+
+        assert cache.get_or_fetch('/frameworks/g-cloud-12', lambda: {'frameworks': {}}) == {'frameworks': {}}
+
+    def test_nothing_is_cached_before_init_app(self):
+        fetch_response = mock.Mock(return_value={'frameworks': {}})
+        cache = APIResponseCache()
+
+        cache.get_or_fetch('/frameworks/g-cloud-12', fetch_response)
+        cache.get_or_fetch('/frameworks/g-cloud-12', fetch_response)
+
+        assert fetch_response.call_count == 2